@@ -26,10 +26,15 @@
 
 # NB.:
 # - Jitter in the Sequencer playback means hit "Refresh Sequencer" button.
+# - Frame handler timings, cache hits and dropped frames are shown in the
+#   sidebar while linked, and can be dumped to JSON with a cProfile capture.
 
 
 # Update to 3.4
 # Using Linked scene as intermediate to get preview and render of strips referencing the current scene.
+# One intermediate scene is shared by all strips of a scene, registered through
+# custom properties. "Clean Up Scene Copies" moves strips off the per-camera
+# copies made by older versions and removes the unused copies.
 
 bl_info = {
     "name": "Scene Strip Tools",
@@ -43,15 +48,35 @@ bl_info = {
     "category": "Sequencer"}
 
 
+import aud
 import bpy
 import mathutils
+import numpy as np
 from mathutils import Matrix
 from bpy.utils import register_class, unregister_class
 from bpy.props import BoolProperty, EnumProperty
 from bpy.types import Panel, Menu
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 from rna_prop_ui import PropertyPanel
 from operator import attrgetter
+from bisect import bisect_right
+from bpy.app.handlers import persistent
+from collections import deque
+import array
+import cProfile
+import csv
+import hashlib
+import heapq
+import io
+import json
 import os
+import pstats
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
 
 
 def act_strip(context):
@@ -72,45 +97,891 @@ def set3d_view_global():
                         override = {'area': area, 'region': region}  # override context
                         bpy.ops.view3d.localview(override)  # switch to global view
 
-oldStrip = ""
 
+# Scene strips can't show the scene they are in, so they show a linked copy of
+# it. The copy and its source point at each other through custom properties.
+SOURCE_SCENE_PROP = "scene_strip_tools_source"
+INTERMEDIATE_SCENE_PROP = "scene_strip_tools_intermediate"
+
+
+def is_legacy_copy(scene):
+    # copies made per camera by older versions: a ".001" suffix and the empty
+    # sequence editor left by deleting the strips of the copy
+    return (SOURCE_SCENE_PROP not in scene
+            and re.fullmatch(r".+\.\d{3}", scene.name) is not None
+            and scene.sequence_editor is not None
+            and not scene.sequence_editor.sequences_all
+            and bpy.data.scenes.get(scene.name[:-4]) is not None)
+
+
+def source_scene_of(scene):
+    # the scene shown through an intermediate scene, or the scene itself
+    source = scene.get(SOURCE_SCENE_PROP)
+    if isinstance(source, bpy.types.Scene):
+        return source
+    if is_legacy_copy(scene):
+        return bpy.data.scenes[scene.name[:-4]]
+    return scene
+
+
+def get_intermediate_scene(source, create=True):
+    # the one linked copy of source shown by all of its camera scene strips
+    intermediate = source.get(INTERMEDIATE_SCENE_PROP)
+    if isinstance(intermediate, bpy.types.Scene) and intermediate.get(SOURCE_SCENE_PROP) == source:
+        return intermediate
+    if not create:
+        return None
+
+    intermediate = source.copy()
+    intermediate.name = source.name + " Strips"
+    intermediate.property_unset("asset_manager")  # only the source is linked or baked
+    if intermediate.sequence_editor:
+        intermediate.sequence_editor_clear()
+    intermediate.timeline_markers.clear()
+    if INTERMEDIATE_SCENE_PROP in intermediate:
+        del intermediate[INTERMEDIATE_SCENE_PROP]
+    intermediate[SOURCE_SCENE_PROP] = source
+    source[INTERMEDIATE_SCENE_PROP] = intermediate
+    return intermediate
+
+
+def is_camera_strip(seq, scene):
+    # scene strips showing this scene, or its intermediate, through a camera
+    return (seq.type == 'SCENE'
+            and not seq.mute
+            and seq.scene is not None
+            and seq.scene_camera is not None
+            and source_scene_of(seq.scene) == scene)
+
+
+def flatten_intervals(intervals):
+    # Resolve overlapping (start, end, rank, payload) intervals into sorted,
+    # non-overlapping (start, end, interval index) segments. The interval with
+    # the lowest rank wins where several overlap.
+    bounds = sorted({frame for iv in intervals for frame in iv[:2]})
+    by_start = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    segments = []
+    active = []
+    pos = 0
+    for lo, hi in zip(bounds, bounds[1:]):
+        while pos < len(by_start) and intervals[by_start[pos]][0] <= lo:
+            i = by_start[pos]
+            heapq.heappush(active, (intervals[i][2], i))
+            pos += 1
+        while active and intervals[active[0][1]][1] <= lo:
+            heapq.heappop(active)
+        if not active:
+            continue
+        i = active[0][1]
+        if segments and segments[-1][2] == i and segments[-1][1] == lo:
+            segments[-1][1] = hi
+        else:
+            segments.append([lo, hi, i])
+    return segments
+
+
+def timeline_strips(sequences, lo=None, hi=None, channels=()):
+    # (strip, start, end, channels) for every strip showing on screen, with
+    # strips inside meta strips clipped to the range of their metas. Channels
+    # are the channel numbers from the top level down to the strip.
+    for seq in sequences:
+        start, end = seq.frame_final_start, seq.frame_final_end
+        if lo is not None:
+            start, end = max(start, lo), min(end, hi)
+        if start >= end:
+            continue
+        if seq.type == 'META':
+            if not seq.mute:
+                yield from timeline_strips(seq.sequences, start, end, channels + (seq.channel,))
+        else:
+            yield seq, start, end, channels + (seq.channel,)
+
+
+class ShotIndex():
+    """Sorted camera segments of a scene edit, queried by frame"""
+
+    def __init__(self, scene):
+        intervals = []
+        for seq, start, end, channels in timeline_strips(scene.sequence_editor.sequences):
+            if is_camera_strip(seq, scene):
+                # higher channels win, first at the top level, then inside metas
+                intervals.append((
+                    start,
+                    end,
+                    (tuple(-channel for channel in channels), seq.frame_final_start),
+                    (seq.name, seq.scene_camera.name, shot_collections(seq)),
+                ))
+        segments = flatten_intervals(intervals)
+        self.starts = [seg[0] for seg in segments]
+        self.ends = [seg[1] for seg in segments]
+        self.strips = [intervals[seg[2]][3][0] for seg in segments]
+        self.cameras = [intervals[seg[2]][3][1] for seg in segments]
+        self.collections = [intervals[seg[2]][3][2] for seg in segments]
+        self.current = -1  # segment last applied to the scene
+        self.cuts = {start: i for i, start in enumerate(self.starts)}
+        self.culled = {}  # shot collections: collections hidden for them
+
+    def lookup(self, frame):
+        i = bisect_right(self.starts, frame) - 1
+        if i >= 0 and frame < self.ends[i]:
+            return i
+        return -1
+
+    def lookup_playing(self, frame):
+        # playback mostly stays in the current shot or steps onto the next cut
+        i = self.current
+        if 0 <= i and self.starts[i] <= frame < self.ends[i]:
+            return i
+        i = self.cuts.get(frame)
+        if i is not None:
+            return i
+        return self.lookup(frame)
+
+
+shot_indices = {}
+own_camera_writes = set()
+
+
+def get_shot_index(scene):
+    index = shot_indices.get(scene.name)
+    if index is None:
+        index = shot_indices[scene.name] = ShotIndex(scene)
+    return index
+
+
+def invalidate_shot_index(scene=None):
+    if scene is None:
+        shot_indices.clear()
+    else:
+        shot_indices.pop(scene.name, None)
+
+
+class ViewportCache():
+    """The 3D viewports of each window, rescanned only when its layout changes"""
+
+    def __init__(self):
+        self.windows = {}  # window pointer: ((screen pointer, area count), areas, [(area pointer, region_3d)])
+
+    def invalidate(self, *args):
+        self.windows.clear()
+
+    @staticmethod
+    def area_layout(screen):
+        return tuple((area.as_pointer(), area.type) for area in screen.areas)
+
+    def window_viewports(self, window):
+        # Per frame only the screen and its area count are compared. A split
+        # and a join between two checks keep the count, which the per-area
+        # check in check_layouts catches on a slow timer.
+        screen = window.screen
+        if screen is None:
+            return []
+        key = window.as_pointer()
+        layout = (screen.as_pointer(), len(screen.areas))
+        cached = self.windows.get(key)
+        if cached is None or cached[0] != layout:
+            viewports = [(area.as_pointer(), area.spaces.active.region_3d)
+                         for area in screen.areas if area.type == 'VIEW_3D']
+            cached = self.windows[key] = (layout, self.area_layout(screen), viewports)
+        return cached[2]
+
+    def check_layouts(self):
+        for window in bpy.context.window_manager.windows:
+            key = window.as_pointer()
+            cached = self.windows.get(key)
+            if cached and (window.screen is None or cached[1] != self.area_layout(window.screen)):
+                del self.windows[key]
+
+    def viewports(self, scene=None):
+        # (area pointer, region_3d) of the viewports in every window showing scene
+        windows = bpy.context.window_manager.windows
+        if len(self.windows) > len(windows):  # a window was closed
+            open_windows = {window.as_pointer() for window in windows}
+            for key in [key for key in self.windows if key not in open_windows]:
+                del self.windows[key]
+        for window in windows:
+            if scene is None or window.scene == scene:
+                yield from self.window_viewports(window)
+
+
+viewport_cache = ViewportCache()
+LAYOUT_CHECK_INTERVAL = 0.5  # seconds between the per-area checks of the cached viewports
+
+
+def check_viewport_layouts():
+    viewport_cache.check_layouts()
+    return LAYOUT_CHECK_INTERVAL
+unfollowed_viewports = set()  # area pointers of viewports not following the sequencer
+
+
+def follow_camera(scene, window=None):
+    # put the following viewports of scene, or of one window, in camera view
+    if window is None:
+        viewports = viewport_cache.viewports(scene)
+    else:
+        viewports = viewport_cache.window_viewports(window)
+    for area_pointer, region_3d in viewports:
+        if area_pointer not in unfollowed_viewports and region_3d.view_perspective != 'CAMERA':
+            region_3d.view_perspective = 'CAMERA'
+
+
+class HandlerStats():
+    """Ring buffer of frame-change handler timings"""
+
+    size = 1000
+
+    def __init__(self):
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        self.samples = deque(maxlen=self.size)  # (frame, seconds, cache hit, camera switched)
+        self.hits = 0
+        self.misses = 0
+        self.switches = 0
+        self.dropped = 0
+        self.over_budget = 0
+        self.last_frame = None
+        if self.profiler:
+            self.profiler = cProfile.Profile()
+
+    def add(self, scene, seconds, hit, switched):
+        frame = scene.frame_current
+        self.samples.append((frame, seconds, hit, switched))
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if switched:
+            self.switches += 1
+        # frames skipped by playback to keep up
+        if values.playing and self.last_frame is not None and frame - self.last_frame > 1:
+            self.dropped += frame - self.last_frame - 1
+        self.last_frame = frame
+        if seconds > scene.render.fps_base / scene.render.fps:
+            self.over_budget += 1
+
+    def summary(self):
+        times = sorted(sample[1] for sample in self.samples)
+
+        def ms(fraction):
+            return times[min(len(times) - 1, int(fraction * len(times)))] * 1000.0 if times else 0.0
+
+        return {
+            "samples": len(times),
+            "p50_ms": ms(0.50),
+            "p95_ms": ms(0.95),
+            "max_ms": times[-1] * 1000.0 if times else 0.0,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "camera_switches": self.switches,
+            "dropped_frames": self.dropped,
+            "over_budget_frames": self.over_budget,
+        }
+
+
+handler_stats = HandlerStats()
+
+
+def get_handler_stats():
+    return handler_stats.summary()
+
+
+def dump_handler_stats(filepath):
+    data = handler_stats.summary()
+    data["frames"] = [
+        {"frame": frame, "ms": seconds * 1000.0, "cache_hit": hit, "switched": switched}
+        for frame, seconds, hit, switched in handler_stats.samples
+    ]
+    if handler_stats.profiler:
+        stream = io.StringIO()
+        pstats.Stats(handler_stats.profiler, stream=stream).sort_stats("cumulative").print_stats(50)
+        data["profile"] = stream.getvalue()
+    with open(filepath, "w") as output:
+        json.dump(data, output, indent=2)
+
+
+# Per-shot collection culling. Camera strips can list the collections their
+# shot needs, every other collection of the scene is hidden while it shows.
+SHOT_COLLECTIONS_PROP = "scene_strip_tools_collections"
+
+# objects which are never culled, as they light or frame every shot
+UNCULLED_TYPES = {'CAMERA', 'LIGHT', 'LIGHT_PROBE', 'SPEAKER'}
+
+
+def shot_collections(strip):
+    names = strip.get(SHOT_COLLECTIONS_PROP)
+    return None if names is None else frozenset(names)
+
+
+def culled_collections(scene, visible):
+    # names of the collections to hide for a shot needing visible, keeping
+    # the parents and children of the collections it needs
+    if visible is None:
+        return frozenset()
+    collections = scene.collection.children_recursive
+    parents = {}
+    for collection in collections:
+        for child in collection.children:
+            parents.setdefault(child.name, []).append(collection.name)
+    keep = set()
+    for collection in collections:
+        if collection.name in visible:
+            keep.add(collection.name)
+            keep.update(child.name for child in collection.children_recursive)
+    stack = list(keep)
+    while stack:
+        for parent in parents.get(stack.pop(), ()):
+            if parent not in keep:
+                keep.add(parent)
+                stack.append(parent)
+    return frozenset(collection.name for collection in collections if collection.name not in keep)
+
+
+def layer_collections(view_layer):
+    # collection name: layer collection, for the whole tree of a view layer
+    found = {}
+    stack = list(view_layer.layer_collection.children)
+    while stack:
+        layer_collection = stack.pop()
+        found[layer_collection.name] = layer_collection
+        stack.extend(layer_collection.children)
+    return found
+
+
+culled_state = {}  # scene name: (mode, hidden collection names, (view layer, collection) flipped by us)
+
+
+def cull_collections(scene, hidden, mode):
+    # Hide the collections of the next shot as a diff against the last one.
+    # Collections the user hid are left alone. Returns True if anything changed.
+    old_mode, old_hidden, flipped = culled_state.get(scene.name, (mode, frozenset(), frozenset()))
+    if old_mode != mode:
+        restore_collections(scene)
+        old_hidden, flipped = frozenset(), frozenset()
+    show = old_hidden - hidden
+    hide = hidden - old_hidden
+    if not show and not hide:
+        return False
+    attribute = "exclude" if mode == 'EXCLUDE' else "hide_viewport"
+    flipped = set(flipped)
+    for view_layer in scene.view_layers:
+        found = layer_collections(view_layer)
+        for name in show:
+            key = (view_layer.name, name)
+            if key in flipped:
+                flipped.discard(key)
+                if name in found:
+                    setattr(found[name], attribute, False)
+        for name in hide:
+            layer_collection = found.get(name)
+            if layer_collection and not getattr(layer_collection, attribute):
+                setattr(layer_collection, attribute, True)
+                flipped.add((view_layer.name, name))
+    culled_state[scene.name] = (mode, hidden, frozenset(flipped))
+    return True
+
+
+def restore_collections(scene):
+    state = culled_state.pop(scene.name, None)
+    if not state:
+        return
+    mode, hidden, flipped = state
+    attribute = "exclude" if mode == 'EXCLUDE' else "hide_viewport"
+    for view_layer in scene.view_layers:
+        found = layer_collections(view_layer)
+        for name in hidden:
+            if (view_layer.name, name) in flipped and name in found:
+                setattr(found[name], attribute, False)
+
+
+def frustum_objects(scene, camera, objects):
+    # objects whose bounding box may show in the camera view at the current
+    # frame. Boxes crossing the camera plane always count as visible.
+    if not objects:
+        return []
+    data = camera.data
+    if data.type == 'PANO':
+        return list(objects)
+    boxes = np.array([obj.bound_box for obj in objects], dtype=np.float64)
+    matrices = np.array([obj.matrix_world for obj in objects], dtype=np.float64)
+    world = np.einsum('nij,nkj->nki', matrices[:, :3, :3], boxes) + matrices[:, None, :3, 3]
+    view = np.array(camera.matrix_world.inverted(), dtype=np.float64)
+    local = world @ view[:3, :3].T + view[:3, 3]
+    depth = -local[..., 2]
+
+    frame = data.view_frame(scene=scene)
+    half_x = max(abs(corner.x) for corner in frame)
+    half_y = max(abs(corner.y) for corner in frame)
+    if data.type == 'ORTHO':
+        x = local[..., 0] / half_x
+        y = local[..., 1] / half_y
+    else:
+        plane = -frame[0].z
+        safe_depth = np.maximum(depth, 1e-6)
+        x = local[..., 0] * plane / (safe_depth * half_x)
+        y = local[..., 1] * plane / (safe_depth * half_y)
+
+    in_front = depth > data.clip_start
+    overlap = ((x.min(axis=1) <= 1.0) & (x.max(axis=1) >= -1.0)
+               & (y.min(axis=1) <= 1.0) & (y.max(axis=1) >= -1.0)
+               & (depth.min(axis=1) <= data.clip_end))
+    visible = in_front.any(axis=1) & (~in_front.all(axis=1) | overlap)
+    return [obj for obj, seen in zip(objects, visible) if seen]
+
+
+def frustum_collections(scene, strip, samples=3):
+    # names of the collections with objects seen by the strip camera, sampled
+    # over the frames of the strip
+    camera = strip.scene_camera
+    start, end = strip.frame_final_start, strip.frame_final_end
+    offset = int(source_frame_offset(strip))
+    frames = sorted({start + (end - 1 - start) * i // max(1, samples - 1) for i in range(samples)})
+    collections = scene.collection.children_recursive
+    objects = [obj for obj in scene.objects if obj.type not in UNCULLED_TYPES]
+    seen = set()
+    for frame in frames:
+        scene.frame_set(frame + offset)
+        seen.update(obj.name for obj in frustum_objects(scene, camera, objects))
+    return [collection.name for collection in collections
+            if any(obj.name in seen or obj.type in UNCULLED_TYPES for obj in collection.objects)]
+
+
+def switch_camera(scene):
+    # returns (index was cached, camera switched)
+    hit = scene.name in shot_indices
+    index = get_shot_index(scene)
+    if values.playing:
+        shot = index.lookup_playing(scene.frame_current)
+    else:
+        shot = index.lookup(scene.frame_current)
+    if shot < 0 or shot == index.current:
+        return hit, False
+    index.current = shot
+
+    camera = bpy.data.objects.get(index.cameras[shot])
+    if camera is None:
+        return hit, False
+    switched = scene.camera != camera
+    if switched:
+        own_camera_writes.add(scene.name)
+        scene.camera = camera
+
+    mode = scene.asset_manager.cull_collections
+    if mode != 'OFF' and not values.rendering:
+        visible = index.collections[shot]
+        culled = index.culled.get(visible)
+        if culled is None:
+            culled = index.culled[visible] = culled_collections(scene, visible)
+        if cull_collections(scene, culled, mode):
+            own_camera_writes.add(scene.name)
+
+    follow_camera(scene)
+    return hit, switched
+
+
+def timed_switch_camera(scene):
+    profiler = handler_stats.profiler
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    hit, switched = switch_camera(scene)
+    if profiler:
+        profiler.disable()
+    handler_stats.add(scene, time.perf_counter() - start, hit, switched)
+
+
+pending_switches = set()  # names of scenes waiting for a debounced camera switch
+
+
+def flush_camera_switches():
+    # the playhead has rested for the debounce interval
+    for scene_name in list(pending_switches):
+        scene = bpy.data.scenes.get(scene_name)
+        if scene and scene.sequence_editor:
+            timed_switch_camera(scene)
+    pending_switches.clear()
+    return None
+
+
+@persistent
+def swich_camera_at_frame_change(scene=None, *pArgs):
+    scene = scene or bpy.context.scene
+    manager = scene.asset_manager
+    if (not scene.sequence_editor or not manager.link_seq_to_3d_view or manager.bake_camera_markers
+            or values.sampling):
+        return
+    if (not values.playing and not values.rendering and not bpy.app.background
+            and get_preference("switch_mode") == 'DEBOUNCED'):
+        # scrubbing: only switch once the playhead stops
+        pending_switches.add(scene.name)
+        if bpy.app.timers.is_registered(flush_camera_switches):
+            bpy.app.timers.unregister(flush_camera_switches)
+        bpy.app.timers.register(flush_camera_switches, first_interval=get_preference("debounce_interval"))
+        return
+    timed_switch_camera(scene)
+
+
+# updates which never change what a scene strip renders
+cache_neutral_types = (
+    bpy.types.Scene,
+    bpy.types.Screen,
+    bpy.types.WindowManager,
+    bpy.types.WorkSpace,
+    bpy.types.Text,
+    bpy.types.Sound,
+    bpy.types.MovieClip,
+)
+
+
+def invalidate_strip_caches(scene, depsgraph):
+    # Drop the cached frames of the camera scene strips showing what changed,
+    # instead of running the sequencer without caches.
+    cameras = set()
+    camera_data = set()
+    actions = set()
+    scene_changed = False
+    for update in depsgraph.updates:
+        data = update.id.original
+        if isinstance(data, cache_neutral_types):
+            continue
+        if isinstance(data, bpy.types.Object) and data.type == 'CAMERA':
+            cameras.add(data.name)
+        elif isinstance(data, bpy.types.Camera):
+            camera_data.add(data.name)
+        elif isinstance(data, bpy.types.Action):
+            actions.add(data.name)
+        else:
+            scene_changed = True
+    if not (cameras or camera_data or actions or scene_changed):
+        return
+
+    source = source_scene_of(scene)
+    for edit_scene, strip in media_index.lookup(('SCENE', source.name)):
+        camera = strip.scene_camera
+        if scene_changed:
+            strip.invalidate_cache('RAW')
+        elif camera and (camera.name in cameras
+                         or camera.data.name in camera_data
+                         or (camera.animation_data and camera.animation_data.action
+                             and camera.animation_data.action.name in actions)
+                         or (camera.data.animation_data and camera.data.animation_data.action
+                             and camera.data.animation_data.action.name in actions)):
+            strip.invalidate_cache('RAW')
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    invalidate_strip_caches(scene, depsgraph)
+    if depsgraph.id_type_updated('SCENE'):
+        for update in depsgraph.updates:
+            if isinstance(update.id, bpy.types.Scene):
+                media_index.mark_dirty(update.id.original)
+        if scene.name in own_camera_writes:  # our own camera switch
+            own_camera_writes.discard(scene.name)
+        else:
+            invalidate_shot_index(scene)
+            if scene.asset_manager.bake_camera_markers and not values.playing:
+                bake_camera_markers(scene)
+
+
+@persistent
+def on_playback_pre(scene, *pArgs):
+    values.playing = True
+
+
+@persistent
+def on_playback_post(scene, *pArgs):
+    values.playing = False
+    if scene.asset_manager.bake_camera_markers:
+        bake_camera_markers(scene)
+
+
+@persistent
+def on_render_init(scene, *pArgs):
+    values.rendering = True
+    # culling is for the viewport only
+    restore_collections(scene)
+    invalidate_shot_index(scene)
+    # make sure the baked cuts are current before rendering starts
+    if scene.asset_manager.bake_camera_markers:
+        bake_camera_markers(scene)
+    # final renders use the live scene strips
+    if scene.asset_manager.use_preview_proxies:
+        set_proxies_muted(scene, True)
+
+
+@persistent
+def on_render_done(scene, *pArgs):
+    values.rendering = False
+    if scene.asset_manager.use_preview_proxies:
+        set_proxies_muted(scene, False)
+
+
+@persistent
+def on_undo_redo(*pArgs):
+    invalidate_shot_index()
+    media_index.mark_dirty()
+
+
+@persistent
+def on_save_pre(*pArgs):
+    # never save the collections hidden by culling, they come back at the next shot
+    for scene_name in list(culled_state):
+        scene = bpy.data.scenes.get(scene_name)
+        if scene:
+            restore_collections(scene)
+            invalidate_shot_index(scene)
+        culled_state.pop(scene_name, None)
+
+
+@persistent
+def on_load_post(*pArgs):
+    invalidate_shot_index()
+    media_index.mark_dirty()
+    own_camera_writes.clear()
+    viewport_cache.invalidate()
+    unfollowed_viewports.clear()
+    culled_state.clear()
+    subscribe_strip_changes()
+    sync_frame_handler()
+
+
+msgbus_owner = object()
+
+# strip properties which move, trim or retarget shots
+watched_strip_props = (
+    (bpy.types.Sequence, "frame_start"),
+    (bpy.types.Sequence, "frame_final_start"),
+    (bpy.types.Sequence, "frame_final_end"),
+    (bpy.types.Sequence, "channel"),
+    (bpy.types.Sequence, "mute"),
+    (bpy.types.SceneSequence, "scene"),
+    (bpy.types.SceneSequence, "scene_camera"),
+)
+
+
+# window properties which change the areas of a screen
+watched_layout_props = (
+    (bpy.types.Window, "screen"),
+    (bpy.types.Window, "workspace"),
+    (bpy.types.Area, "type"),
+    (bpy.types.Area, "ui_type"),
+)
+
+
+def subscribe_strip_changes():
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    for key in watched_strip_props:
+        bpy.msgbus.subscribe_rna(
+            key=key,
+            owner=msgbus_owner,
+            args=(),
+            notify=invalidate_shot_index,
+        )
+    for key in watched_layout_props:
+        bpy.msgbus.subscribe_rna(
+            key=key,
+            owner=msgbus_owner,
+            args=(),
+            notify=viewport_cache.invalidate,
+        )
 
-def swich_camera_at_frame_change(*pArgs):
-    global oldStrip
-    scene = bpy.context.scene
-    sequences = scene.sequence_editor.sequences
-    sequences = sorted(sequences, key=lambda x: (-x.channel, x.frame_final_start))
-    cf = scene.frame_current
 
-    try:
-        for seq in sequences:
-            if hasattr(seq, 'type') and seq.type == 'SCENE' and seq.scene_camera.name != oldStrip:
-                if seq.scene.name[:-4] == scene.name and not seq.mute:
-                    if seq.frame_final_start <= cf < seq.frame_final_end:
-                        for area in bpy.context.screen.areas:
-                            if area.type == 'VIEW_3D':
-                                scene.camera = bpy.data.objects[seq.scene_camera.name]
-                                area.spaces.active.region_3d.view_perspective = 'CAMERA'
-                                oldStrip = seq.scene_camera.name
-                                return
-                        return
-    except AttributeError:
-        pass
-    return
+BAKED_MARKER_PREFIX = "SST_"
+
+
+def is_baked_marker(marker):
+    return marker.name.startswith(BAKED_MARKER_PREFIX)
+
+
+def camera_cuts(scene):
+    # (frame, camera name) for every camera change in the edit
+    index = get_shot_index(scene)
+    cuts = []
+    for start, camera_name in zip(index.starts, index.cameras):
+        if not cuts or cuts[-1][1] != camera_name:
+            cuts.append((start, camera_name))
+    return cuts
+
+
+def sync_camera_markers(scene, cuts, baked=True):
+    # Keep camera-bound markers in sync with (frame, camera name) cuts, only
+    # touching markers which actually differ. Works on the baked markers, or
+    # with baked=False on the user's own camera markers.
+    prefix = BAKED_MARKER_PREFIX if baked else ""
+    markers = scene.timeline_markers
+    wanted = set(cuts)
+    kept = set()
+    stale = []
+    for marker in markers:
+        if is_baked_marker(marker) != baked or (not baked and marker.camera is None):
+            continue
+        key = (marker.frame, marker.camera.name if marker.camera else None)
+        if key in wanted and key not in kept:
+            kept.add(key)
+        else:
+            stale.append(marker)
+    missing = [cut for cut in cuts if cut not in kept]
+
+    for marker, (frame, camera_name) in zip(stale, missing):
+        old_camera = marker.camera
+        marker.frame = frame
+        marker.camera = bpy.data.objects.get(camera_name)
+        if baked or (old_camera and marker.name == old_camera.name):
+            marker.name = prefix + camera_name
+    for marker in stale[len(missing):]:
+        markers.remove(marker)
+    for frame, camera_name in missing[len(stale):]:
+        marker = markers.new(prefix + camera_name, frame=frame)
+        marker.camera = bpy.data.objects.get(camera_name)
+    return min(len(stale), len(missing)), max(0, len(stale) - len(missing)), max(0, len(missing) - len(stale))
+
+
+# Blender switches cameras at every camera-bound marker, so the user's own
+# camera markers would override the baked cuts. They are unbound while the
+# cuts are baked, and bound again when baking is turned off.
+UNBOUND_MARKERS_PROP = "scene_strip_tools_unbound_markers"
+
+
+def marker_key(marker):
+    return "%d %s" % (marker.frame, marker.name)
+
+
+def unbind_camera_markers(scene):
+    for marker in scene.timeline_markers:
+        if marker.camera and not is_baked_marker(marker):
+            if UNBOUND_MARKERS_PROP not in scene:
+                scene[UNBOUND_MARKERS_PROP] = {}
+            scene[UNBOUND_MARKERS_PROP][marker_key(marker)] = marker.camera
+            marker.camera = None
+
+
+def rebind_camera_markers(scene):
+    unbound = scene.get(UNBOUND_MARKERS_PROP)
+    if unbound is None:
+        return
+    for marker in scene.timeline_markers:
+        if marker.camera is None and not is_baked_marker(marker):
+            camera = unbound.get(marker_key(marker))
+            if isinstance(camera, bpy.types.Object):
+                marker.camera = camera
+    del scene[UNBOUND_MARKERS_PROP]
+
+
+def bake_camera_markers(scene):
+    unbind_camera_markers(scene)
+    return sync_camera_markers(scene, camera_cuts(scene))
+
+
+def clear_baked_markers(scene):
+    markers = scene.timeline_markers
+    for marker in [marker for marker in markers if is_baked_marker(marker)]:
+        markers.remove(marker)
+    rebind_camera_markers(scene)
+
+
+def update_bake_camera_markers(self, context):
+    scene = self.id_data
+    if self.bake_camera_markers:
+        invalidate_shot_index(scene)
+        bake_camera_markers(scene)
+    else:
+        clear_baked_markers(scene)
+    sync_frame_handler()
+
+
+def is_own_handler(func):
+    # match by name, so copies left behind by an add-on reload are found too
+    return (getattr(func, "__name__", "") == swich_camera_at_frame_change.__name__
+            and getattr(func, "__module__", "") == __name__)
+
+
+def handler_count():
+    return sum(1 for func in bpy.app.handlers.frame_change_post if is_own_handler(func))
 
 
 def attach_as_handler():
+    if handler_count() == 1:
+        return
+    detach_as_handler()
     bpy.app.handlers.frame_change_post.append(swich_camera_at_frame_change)
 
+
 def detach_as_handler():
-    bpy.app.handlers.frame_change_post.clear()
+    handlers = bpy.app.handlers.frame_change_post
+    for func in [func for func in handlers if is_own_handler(func)]:
+        handlers.remove(func)
+
+
+def sync_frame_handler():
+    # one handler for all scenes, as long as any of them is linked and not
+    # left to baked markers
+    if any(scene.asset_manager.link_seq_to_3d_view and not scene.asset_manager.bake_camera_markers
+           for scene in bpy.data.scenes if SOURCE_SCENE_PROP not in scene):
+        attach_as_handler()
+    else:
+        detach_as_handler()
+
+
+def update_link_seq_to_3d_view(self, context):
+    sync_frame_handler()
+    if self.link_seq_to_3d_view:
+        invalidate_shot_index(self.id_data)
+        swich_camera_at_frame_change(self.id_data)
+    else:
+        restore_collections(self.id_data)
+
+
+def update_use_preview_proxies(self, context):
+    set_proxies_muted(self.id_data, not self.use_preview_proxies)
+
+
+def update_cull_collections(self, context):
+    scene = self.id_data
+    restore_collections(scene)
+    invalidate_shot_index(scene)
+    if self.link_seq_to_3d_view:
+        swich_camera_at_frame_change(scene)
+
+
+def update_profile_frame_handler(self, context):
+    handler_stats.profiler = cProfile.Profile() if self.profile_frame_handler else None
 
 
 class PropertyGroup(bpy.types.PropertyGroup):
 
     link_seq_to_3d_view: bpy.props.BoolProperty(
         name='Link Sequencer to 3D View',
-        description='Let scene strips swich cameras in 3D Viewport')
+        description='Let scene strips swich cameras in 3D Viewport',
+        update=update_link_seq_to_3d_view)
+
+    bake_camera_markers: bpy.props.BoolProperty(
+        name='Bake Cuts to Markers',
+        description='Keep camera-bound timeline markers in sync with the scene strip cuts, '
+                    'so Blender switches cameras itself during playback and rendering',
+        update=update_bake_camera_markers)
+
+    use_preview_proxies: bpy.props.BoolProperty(
+        name='Use Preview Proxies',
+        description='Play back the rendered low resolution proxies instead of the live scene strips',
+        update=update_use_preview_proxies)
+
+    cull_collections: EnumProperty(
+        name='Cull Collections',
+        description='Hide the collections a camera strip does not list while its shot shows',
+        items=(
+            ('OFF', "Off", "Show every collection"),
+            ('HIDE', "Hide in Viewport", "Hide the collections in the viewport, quick to toggle"),
+            ('EXCLUDE', "Exclude", "Exclude the collections from the view layer, so they are not evaluated at all"),
+        ),
+        default='OFF',
+        update=update_cull_collections)
+
+    profile_frame_handler: bpy.props.BoolProperty(
+        name='Profile Frame Handler',
+        description='Capture a cProfile profile of the frame-change handler',
+        update=update_profile_frame_handler)
 
 
 class SEQUENCER_PT_scene_tools(Panel):
@@ -133,17 +1004,74 @@ class SEQUENCER_PT_scene_tools(Panel):
         manager = context.scene.asset_manager
 
         col.prop(manager, "link_seq_to_3d_view", text="Link Sequencer to 3D Viewport", icon="LINKED")
+        col.prop(manager, "bake_camera_markers", text="Bake Cuts to Camera Markers", icon="MARKER_HLT")
+        if manager.bake_camera_markers and UNBOUND_MARKERS_PROP in context.scene:
+            col.label(text="%d camera markers unbound while baked" % len(context.scene[UNBOUND_MARKERS_PROP]),
+                      icon="INFO")
+        row = col.row(align=True)
+        row.prop(manager, "cull_collections", text="Cull", icon="OUTLINER_COLLECTION")
+        row.operator_menu_enum("sequencer.set_shot_collections", "source", text="Set Shot Collections")
         col.operator("view3d.add_scene_strip", text="Add Camera as Scene Strip", icon="CAMERA_DATA")
+        col.operator("view3d.add_selected_cameras", text="Add Selected Cameras as Scene Strips", icon="OUTLINER_OB_CAMERA")
+        col.operator("sequencer.split_camera_cuts", text="Split Animated Camera into Scene Strips", icon="SEQ_SPLITVIEW")
         col.operator("sequencer.convert_cameras", text="Convert Camera Markers to Strips", icon="MARKER")
+        row = col.row(align=True)
+        row.operator("sequencer.sync_camera_markers", text="Sync Markers to Strips", icon="FILE_REFRESH").direction = 'TO_STRIPS'
+        row.operator("sequencer.sync_camera_markers", text="Sync Strips to Markers", icon="FILE_REFRESH").direction = 'TO_MARKERS'
         col.operator("sequencer.match_frame", text="Find Matching Frame", icon="IMAGE_REFERENCE")
+        col.operator("sequencer.find_edit_uses", text="Find Edit Uses", icon="VIEWZOOM")
+        col.operator("sequencer.timeline_report", text="Timeline Report", icon="SEQ_STRIP_DUPLICATE")
+        col.operator("sequencer.suggest_audio_cuts", text="Audio Cut Suggestions", icon="SOUND")
+        col.operator("sequencer.cleanup_intermediate_scenes", text="Clean Up Scene Copies", icon="TRASH")
+        row = col.row(align=True)
+        row.operator("sequencer.export_shot_list", text="Export Shots", icon="EXPORT")
+        row.operator("sequencer.import_shot_list", text="Import Shots", icon="IMPORT")
         col.operator("sequencer.scene_change", text="Toggle Scene Strip", icon="VIEW3D")
 
-        # check if bool property is enabled
-        if (context.scene.asset_manager.link_seq_to_3d_view == True):
-            swich_camera_at_frame_change()
-            attach_as_handler()
-        else:
-            detach_as_handler()
+        col = layout.box().column(align=True)
+        col.operator("sequencer.render_preview_proxies", text="Render Preview Proxies", icon="RENDER_ANIMATION")
+        col.prop(manager, "use_preview_proxies", text="Use Preview Proxies", icon="SEQ_PREVIEW")
+        col.operator("sequencer.render_shots", text="Render Shots in Parallel", icon="RENDER_RESULT")
+        col.operator("sequencer.storyboard_contact_sheet", text="Storyboard Contact Sheet", icon="IMGDISPLAY")
+
+        if manager.link_seq_to_3d_view:
+            stats = handler_stats.summary()
+            col = layout.box().column(align=True)
+            col.label(text="Frame Handler", icon="TIME")
+            col.label(text="p50 %.2f ms  p95 %.2f ms  max %.2f ms" % (
+                stats["p50_ms"], stats["p95_ms"], stats["max_ms"]))
+            col.label(text="Cache hits %d  misses %d" % (stats["cache_hits"], stats["cache_misses"]))
+            col.label(text="Camera switches %d" % stats["camera_switches"])
+            col.label(text="Dropped frames %d  over budget %d" % (
+                stats["dropped_frames"], stats["over_budget_frames"]))
+            col.prop(manager, "profile_frame_handler", text="Profile", icon="PREVIEW_RANGE")
+            row = col.row(align=True)
+            row.operator("sequencer.dump_handler_stats", text="Dump", icon="EXPORT")
+            row.operator("sequencer.reset_handler_stats", text="Reset", icon="LOOP_BACK")
+
+
+class SEQUENCER_OT_reset_handler_stats(bpy.types.Operator):
+    """Clear the recorded frame handler timings"""
+    bl_idname = "sequencer.reset_handler_stats"
+    bl_label = "Reset Frame Handler Stats"
+
+    def execute(self, context):
+        handler_stats.reset()
+        return {'FINISHED'}
+
+
+class SEQUENCER_OT_dump_handler_stats(bpy.types.Operator, ExportHelper):
+    """Write the recorded frame handler timings and profile to a JSON file"""
+    bl_idname = "sequencer.dump_handler_stats"
+    bl_label = "Dump Frame Handler Stats"
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        dump_handler_stats(self.filepath)
+        self.report({'INFO'}, "Frame handler stats written to " + self.filepath)
+        return {'FINISHED'}
 
 
 class VIEW_3D_PT_add_scene_strip(bpy.types.Operator):
@@ -153,117 +1081,815 @@ class VIEW_3D_PT_add_scene_strip(bpy.types.Operator):
     bl_options = {'REGISTER', "UNDO"}
 
     def invoke(self, context, event):
-        # Ensure updates in preview on frame change
-        ed = bpy.context.scene.sequence_editor
-        ed.use_cache_raw = False
-        ed.use_cache_preprocessed = False
-        ed.use_cache_composite = False
-        ed.use_cache_final = False
+        scene = context.scene
+        if not scene.camera:
+            self.report({'WARNING'}, "The scene has no camera")
+            return {'CANCELLED'}
+        if not scene.sequence_editor:
+            scene.sequence_editor_create()
 
-        if not bpy.context.scene.sequence_editor:
-            bpy.context.scene.sequence_editor_create()
-        scn = bpy.context.scene
-        seq = scn.sequence_editor
-        cf = scn.frame_current
-        scene_name = bpy.context.scene.name
-        bpy.data.scenes[scene_name].render.resolution_percentage = 100
-        ns = bpy.data.scenes[scene_name].copy()
-        bpy.data.scenes[scene_name].use_fake_user = True
-
-        # Can't change name, as it is used to find the scene later on.         
-        #        new_scene_name = os.path.splitext(ns.name)[0]+"_"+bpy.context.scene.camera.name
-        #        bpy.data.scenes[ns.name].name = new_scene_name
-        #        ns = bpy.data.scenes[ns.name]
-
-        addSceneIn = cf
-        addSceneOut = scn.frame_end
-        addSceneChannel = 2
-        addSceneTlStart = cf
-        newScene = seq.sequences.new_scene('Scene', ns, addSceneChannel, addSceneTlStart)
-        seq.sequences_all[newScene.name].scene_camera = bpy.data.objects[bpy.context.scene.camera.name]
-        seq.sequences_all[newScene.name].frame_offset_start = addSceneIn
-        seq.sequences_all[newScene.name].frame_final_end = addSceneOut
-        seq.sequences_all[newScene.name].frame_start = 0
-
-        # Get the current scene
-        original_scene = bpy.context.scene
-        
-        # Change to the new scene
-        bpy.context.window.scene = ns
-        if bpy.context.scene.sequence_editor:
-            bpy.ops.sequencer.select_all(action='SELECT')
-            bpy.ops.sequencer.delete()
-
-        # Change back to the original scene
-        bpy.context.window.scene = original_scene
+        ed = scene.sequence_editor
+        scene.render.resolution_percentage = 100
+        scene.use_fake_user = True
+
+        addSceneIn = scene.frame_current
+        addSceneOut = scene.frame_end
+        if addSceneOut <= addSceneIn:
+            return {'CANCELLED'}
+        allocator = ChannelAllocator.from_sequences(ed.sequences)
+        addSceneChannel = allocator.allocate(addSceneIn, addSceneOut, 2)
+        if addSceneChannel is None:
+            return {'CANCELLED'}
+        plan = [(scene.camera.name, addSceneIn, addSceneOut, addSceneChannel)]
+        apply_camera_strip_plan(scene, plan, get_intermediate_scene(scene))
 
         return {"FINISHED"}
 
 
+MAX_CHANNEL = 128
+LAST_SHOT_LENGTH = 151  # last clip extented 30 fps*5 frames + an ekstra frame
+
+
+class ChannelAllocator():
+    """Finds the lowest free channel for new strips, so inserts never collide"""
+
+    def __init__(self, occupied=()):
+        self.channels = {}  # channel: (sorted starts, matching ends)
+        for channel, start, end in occupied:
+            self.add(channel, start, end)
+
+    def add(self, channel, start, end):
+        starts, ends = self.channels.setdefault(channel, ([], []))
+        i = bisect_right(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+
+    def is_free(self, channel, start, end):
+        if channel not in self.channels:
+            return True
+        starts, ends = self.channels[channel]
+        i = bisect_right(starts, start) - 1
+        if i >= 0 and ends[i] > start:
+            return False
+        return i + 1 >= len(starts) or starts[i + 1] >= end
+
+    def allocate(self, start, end, channel=1):
+        while channel <= MAX_CHANNEL:
+            if self.is_free(channel, start, end):
+                self.add(channel, start, end)
+                return channel
+            channel += 1
+        return None
+
+    @classmethod
+    def from_sequences(cls, sequences):
+        return cls((seq.channel, seq.frame_final_start, seq.frame_final_end) for seq in sequences)
+
+
+def cut_shots(cuts, last_length=LAST_SHOT_LENGTH):
+    # Turn (frame, camera name) cuts into (camera name, start, end) shots,
+    # each running until the next cut.
+    cuts = sorted(cuts, key=lambda cut: cut[0])
+    shots = []
+    for i, (start, camera_name) in enumerate(cuts):
+        end = cuts[i + 1][0] if i + 1 < len(cuts) else start + last_length
+        if end > start:  # skips all but the last of several markers on one frame
+            shots.append((camera_name, start, end))
+    return shots
+
+
+def plan_camera_strips(cuts, allocator, channel=1, last_length=LAST_SHOT_LENGTH):
+    # (camera name, start, end, channel) strips for the cuts
+    plan = []
+    for camera_name, start, end in cut_shots(cuts, last_length):
+        new_channel = allocator.allocate(start, end, channel)
+        if new_channel is not None:
+            plan.append((camera_name, start, end, new_channel))
+    return plan
+
+
+def marker_cuts(scene):
+    # the user's camera markers, including those unbound while the cuts are baked
+    unbound = scene.get(UNBOUND_MARKERS_PROP) or {}
+    cuts = []
+    for marker in scene.timeline_markers:
+        if is_baked_marker(marker):
+            continue
+        camera = marker.camera or unbound.get(marker_key(marker))
+        if isinstance(camera, bpy.types.Object):
+            cuts.append((marker.frame, camera.name))
+    return cuts
+
+
+def plan_marker_conversion(scene):
+    ed = scene.sequence_editor
+    allocator = ChannelAllocator.from_sequences(ed.sequences) if ed else ChannelAllocator()
+    return plan_camera_strips(marker_cuts(scene), allocator)
+
+
+def apply_camera_strip_plan(scene, plan, source_scene):
+    # Add all planned strips in one pass. Each strip is added untrimmed on a
+    # free staging channel and only moved to its planned channel once trimmed,
+    # so Blender never has to shuffle it out of the way.
+    if not plan:
+        return []
+    if not scene.sequence_editor:
+        scene.sequence_editor_create()
+    sequences = scene.sequence_editor.sequences
+    staging = max([seq.channel for seq in sequences] + [shot[3] for shot in plan]) + 1
+    last_end = max(shot[2] for shot in plan)
+
+    # Hack: adding a scene strip will make a hard cut one frame before preview area end.
+    frame_end = source_scene.frame_end
+    source_scene.frame_end = max(frame_end, last_end) + 1
+
+    strips = []
+    for shot in sorted(plan, key=lambda shot: shot[1]):
+        camera_name, start, end, channel = shot[:4]
+        name = shot[4] if len(shot) > 4 else camera_name  # optional strip name
+        strip = sequences.new_scene(name, source_scene, min(staging, MAX_CHANNEL), start)
+        strip.scene_camera = bpy.data.objects[camera_name]
+        strip.animation_offset_start = start
+        strip.frame_final_end = end
+        strip.frame_start = start
+        strip.channel = channel
+        strips.append(strip)
+
+    source_scene.frame_end = max(frame_end, last_end - 1)
+    scene.frame_end = max(scene.frame_end, last_end - 1)  # extent preview area
+    return strips
+
+
+def diff_camera_strips(existing, wanted):
+    # Match (camera name, start, end, strip) existing strips against wanted
+    # (camera name, start, end) shots. Identical strips are kept, strips of
+    # the same camera are moved or trimmed, then any leftover strip is
+    # reused for another camera. Returns kept strips, (strip, shot) changes,
+    # strips to remove and shots to add.
+    exact = {}
+    for camera_name, start, end, strip in existing:
+        exact.setdefault((camera_name, start, end), []).append(strip)
+    kept = []
+    unmatched = []
+    for shot in wanted:
+        strips = exact.get(shot)
+        if strips:
+            kept.append(strips.pop())
+        else:
+            unmatched.append(shot)
+    unmatched.sort(key=lambda shot: shot[1])  # paired in edit order with the leftovers
+    leftover = [(camera_name, start, end, strip) for camera_name, start, end, strip in existing
+                if strip in exact.get((camera_name, start, end), ())]
+    leftover.sort(key=lambda item: item[1])
+
+    by_camera = {}
+    for item in leftover:
+        by_camera.setdefault(item[0], deque()).append(item)
+    changed = []
+    added = []
+    for shot in unmatched:
+        same_camera = by_camera.get(shot[0])
+        if same_camera:
+            changed.append((same_camera.popleft()[3], shot))
+        else:
+            added.append(shot)
+    spare = deque(sorted((item for items in by_camera.values() for item in items), key=lambda item: item[1]))
+    reused = min(len(added), len(spare))
+    for shot in added[:reused]:
+        changed.append((spare.popleft()[3], shot))
+    added = added[reused:]
+    removed = [item[3] for item in spare]
+    return kept, changed, removed, added
+
+
+def top_camera_strips(scene):
+    # (camera name, start, end, strip) of the camera strips outside metas
+    existing = []
+    if scene.sequence_editor:
+        for seq in scene.sequence_editor.sequences:
+            if is_camera_strip(seq, scene):
+                existing.append((seq.scene_camera.name, seq.frame_final_start, seq.frame_final_end, seq))
+    return existing
+
+
+def plan_marker_sync(scene):
+    # diff of the camera strips of the edit against the camera markers
+    existing = top_camera_strips(scene)
+    cuts = marker_cuts(scene)
+    last_length = LAST_SHOT_LENGTH
+    if cuts:
+        # keep the length the editor gave the last shot
+        last_cut = max(cuts, key=lambda cut: cut[0])
+        for camera_name, start, end, seq in existing:
+            if (start, camera_name) == last_cut:
+                last_length = end - start
+    return diff_camera_strips(existing, cut_shots(cuts, last_length))
+
+
+def apply_marker_sync(scene, sync, source_scene):
+    # Apply a plan_marker_sync diff. Changed strips are first parked after
+    # the end of the edit, then fitted one at a time on a free staging
+    # channel and dropped onto their planned channel, so no strip is ever
+    # shuffled by Blender on the way.
+    kept, changed, removed, added = sync
+    if not scene.sequence_editor:
+        scene.sequence_editor_create()
+    sequences = scene.sequence_editor.sequences
+    for strip in removed:
+        sequences.remove(strip)
+
+    moving = {strip.name for strip, shot in changed}
+    allocator = ChannelAllocator(
+        (seq.channel, seq.frame_final_start, seq.frame_final_end) for seq in sequences if seq.name not in moving)
+    placed = []
+    for strip, (camera_name, start, end) in changed:
+        channel = allocator.allocate(start, end, strip.channel)
+        if channel is None:
+            sequences.remove(strip)
+        else:
+            placed.append((strip, camera_name, start, end, channel))
+
+    if placed:
+        staging = min(max(seq.channel for seq in sequences) + 1, MAX_CHANNEL)
+        park = max(seq.frame_final_end for seq in sequences) + 1
+        last_end = max(shot[3] for shot in placed)
+        frame_end = source_scene.frame_end
+        source_scene.frame_end = max(frame_end, last_end) + 1
+        for strip, *_ in placed:
+            strip.frame_start += park - strip.frame_final_start
+            park += strip.frame_final_duration
+        for strip, camera_name, start, end, channel in placed:
+            strip.channel = staging
+            strip.scene_camera = bpy.data.objects[camera_name]
+            strip.animation_offset_start = start
+            strip.frame_start = start
+            strip.frame_final_start = start
+            strip.frame_final_end = end
+            strip.channel = channel
+        source_scene.frame_end = max(frame_end, last_end - 1)
+        scene.frame_end = max(scene.frame_end, last_end - 1)
+
+    plan = []
+    for camera_name, start, end in added:
+        channel = allocator.allocate(start, end)
+        if channel is not None:
+            plan.append((camera_name, start, end, channel))
+    apply_camera_strip_plan(scene, plan, source_scene)
+    return len(placed), len(removed) + len(changed) - len(placed), len(plan)
+
+
+class SEQUENCER_OT_sync_camera_markers(bpy.types.Operator):
+    """Sync camera markers and camera scene strips, changing only what differs"""
+    bl_idname = "sequencer.sync_camera_markers"
+    bl_label = "Sync Camera Markers"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    direction: EnumProperty(
+        name="Direction",
+        items=(
+            ('TO_STRIPS', "Markers to Strips", "Insert, move, trim and delete camera strips to match the camera markers"),
+            ('TO_MARKERS', "Strips to Markers", "Insert, move and delete camera markers to match the camera strips"),
+        ),
+        default='TO_STRIPS')
+
+    def execute(self, context):
+        scene = context.scene
+        if self.direction == 'TO_MARKERS':
+            if not scene.sequence_editor:
+                return {'CANCELLED'}
+            if scene.asset_manager.bake_camera_markers:
+                # the user's markers are unbound while baked, the sync would add a second set
+                self.report({'WARNING'}, "Turn off Bake Cuts to Markers before syncing strips to markers")
+                return {'CANCELLED'}
+            invalidate_shot_index(scene)
+            moved, removed, added = sync_camera_markers(scene, camera_cuts(scene), baked=False)
+            what = "markers"
+        else:
+            if not marker_cuts(scene):
+                return {'CANCELLED'}
+            sync = plan_marker_sync(scene)
+            if not any(sync[1:]):
+                self.report({'INFO'}, "Camera strips already match the markers")
+                return {'FINISHED'}
+            moved, removed, added = apply_marker_sync(scene, sync, get_intermediate_scene(scene))
+            what = "strips"
+        self.report({'INFO'}, "Camera %s: %d changed, %d removed, %d added" % (what, moved, removed, added))
+        return {'FINISHED'}
+
+
+# numpy types matching the RNA property types, for foreach_get and foreach_set
+RNA_DTYPES = {'INT': np.int32, 'FLOAT': np.float32, 'BOOLEAN': np.bool_}
+
+
+class TimelineSnapshot():
+    """Strip timings of a sequence collection as a NumPy structured array, edited
+    with vectorized operations and written back with foreach_set"""
+
+    fields = ("channel", "frame_start", "frame_final_start", "frame_final_end",
+              "frame_offset_start", "frame_offset_end", "mute", "lock")
+
+    def __init__(self, sequences):
+        self.sequences = sequences
+        self.read()
+
+    def read(self):
+        sequences = self.sequences
+        count = len(sequences)
+        properties = bpy.types.Sequence.bl_rna.properties
+        self.data = np.empty(count, dtype=[(name, RNA_DTYPES[properties[name].type]) for name in self.fields])
+        for name in self.fields:
+            buffer = np.empty(count, dtype=self.data.dtype[name])
+            sequences.foreach_get(name, buffer)
+            self.data[name] = buffer
+        self.original = self.data.copy()
+
+    def movable(self):
+        return ~self.data["lock"]
+
+    def move(self, mask, offset):
+        self.data["frame_final_start"][mask] += offset
+        self.data["frame_final_end"][mask] += offset
+
+    def shift_after(self, frame, offset):
+        # move every strip starting at or after frame
+        mask = self.movable() & (self.data["frame_final_start"] >= frame)
+        self.move(mask, offset)
+        return int(mask.sum())
+
+    def close_gaps(self, mask):
+        # ripple the strips of mask back to back, in the order they start
+        indices = np.flatnonzero(mask & self.movable())
+        if not len(indices):
+            return 0
+        indices = indices[np.argsort(self.data["frame_final_start"][indices], kind='stable')]
+        starts = self.data["frame_final_start"][indices]
+        lengths = self.data["frame_final_end"][indices] - starts
+        new_starts = starts[0] + np.concatenate(([0], np.cumsum(lengths[:-1])))
+        self.data["frame_final_start"][indices] = new_starts
+        self.data["frame_final_end"][indices] = new_starts + lengths
+        return int((new_starts != starts).sum())
+
+    def scale_timing(self, factor, pivot, mask):
+        # scale the cuts of the strips of mask around pivot, each keeping a frame at least
+        mask = mask & self.movable()
+        starts = self.data["frame_final_start"][mask]
+        ends = self.data["frame_final_end"][mask]
+        new_starts = pivot + np.round((starts - pivot) * factor).astype(starts.dtype)
+        new_ends = pivot + np.round((ends - pivot) * factor).astype(ends.dtype)
+        self.data["frame_final_start"][mask] = new_starts
+        self.data["frame_final_end"][mask] = np.maximum(new_ends, new_starts + 1)
+        return int(mask.sum())
+
+    def overlaps(self):
+        # indices of the strips overlapping another strip of their channel in
+        # the edited layout; sorted by channel and start, any overlap shows up
+        # between neighbours
+        data = self.data
+        order = np.lexsort((data["frame_final_start"], data["channel"]))
+        channels = data["channel"][order]
+        starts = data["frame_final_start"][order]
+        ends = data["frame_final_end"][order]
+        clash = np.flatnonzero((channels[1:] == channels[:-1]) & (starts[1:] < ends[:-1]))
+        return np.unique(np.concatenate((order[clash], order[clash + 1])))
+
+    def write(self):
+        # Write the edits back in two phases. Changed strips are first parked
+        # one after the other beyond the end of the edit, where they are resized
+        # and moved to their new channel, then dropped onto their new frames.
+        # Blender never sees two strips overlap on the way, so it never
+        # shuffles them. Returns the number of changed strips.
+        old, new = self.original, self.data
+        old_lengths = old["frame_final_end"] - old["frame_final_start"]
+        new_lengths = new["frame_final_end"] - new["frame_final_start"]
+        changed = ((old["frame_final_start"] != new["frame_final_start"])
+                   | (old_lengths != new_lengths)
+                   | (old["channel"] != new["channel"]))
+        sequences = self.sequences
+        if changed.any():
+            room = np.maximum(old_lengths, new_lengths)[changed]
+            park = int(max(old["frame_final_end"].max(), new["frame_final_end"].max())) + 1
+            parked = park + np.concatenate(([0], np.cumsum(room[:-1] + 1)))
+
+            starts = old["frame_start"].copy()
+            starts[changed] += parked - old["frame_final_start"][changed]
+            sequences.foreach_set("frame_start", starts)
+            if (old_lengths != new_lengths).any():
+                ends = old["frame_final_end"].copy()
+                ends[changed] = parked + new_lengths[changed]
+                sequences.foreach_set("frame_final_end", ends)
+            if (old["channel"] != new["channel"]).any():
+                sequences.foreach_set("channel", np.ascontiguousarray(new["channel"]))
+            starts[changed] = (old["frame_start"][changed]
+                               + new["frame_final_start"][changed] - old["frame_final_start"][changed])
+            sequences.foreach_set("frame_start", starts)
+        if (old["mute"] != new["mute"]).any():
+            sequences.foreach_set("mute", np.ascontiguousarray(new["mute"]))
+        self.read()
+        return int(changed.sum())
+
+
+class SEQUENCER_OT_shift_strips_after(bpy.types.Operator):
+    """Move every unlocked strip starting at or after the current frame"""
+    bl_idname = "sequencer.shift_strips_after"
+    bl_label = "Shift Strips After Frame"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    offset: bpy.props.IntProperty(
+        name="Offset",
+        description="Frames to move the strips by, negative moves them earlier",
+        default=24)
+    frame: bpy.props.IntProperty(
+        name="Frame",
+        description="Strips starting at or after this frame are moved")
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def invoke(self, context, event):
+        self.frame = context.scene.frame_current
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        snapshot = TimelineSnapshot(context.scene.sequence_editor.sequences)
+        if not snapshot.shift_after(self.frame, self.offset):
+            return {'CANCELLED'}
+        # the strips are written without Blender's overlap shuffle, so refuse
+        # an offset moving them onto the strips left in place
+        overlaps = snapshot.overlaps()
+        if len(overlaps):
+            sequences = snapshot.sequences
+            names = ", ".join(sequences[int(i)].name for i in overlaps[:5])
+            self.report({'ERROR'}, "Shifting by %d frames overlaps %d strips: %s"
+                        % (self.offset, len(overlaps), names))
+            return {'CANCELLED'}
+        moved = snapshot.write()
+        self.report({'INFO'}, "Moved %d strips" % moved)
+        return {'FINISHED'}
+
+
+def camera_order_key(camera, prop_name):
+    # numbers first, then text, then cameras without the property
+    value = camera.get(prop_name) if prop_name else None
+    if isinstance(value, (int, float)):
+        return (0, value, "", camera.name)
+    if value is None:
+        return (2, 0, "", camera.name)
+    return (1, 0, str(value), camera.name)
+
+
+def plan_sequential_strips(camera_names, start, duration, allocator, channel=1):
+    # back-to-back shots, kept in one channel when a channel is free for all of them
+    end = start + duration * len(camera_names)
+    run_channel = channel
+    while run_channel <= MAX_CHANNEL and not allocator.is_free(run_channel, start, end):
+        run_channel += 1
+    plan = []
+    for i, camera_name in enumerate(camera_names):
+        shot_start = start + i * duration
+        if run_channel <= MAX_CHANNEL:
+            allocator.add(run_channel, shot_start, shot_start + duration)
+            shot_channel = run_channel
+        else:
+            shot_channel = allocator.allocate(shot_start, shot_start + duration, channel)
+        if shot_channel is not None:
+            plan.append((camera_name, shot_start, shot_start + duration, shot_channel))
+    return plan
+
+
+class VIEW_3D_OT_add_selected_cameras(bpy.types.Operator):
+    """Adds all selected cameras as scene strips, one after the other"""
+    bl_idname = "view3d.add_selected_cameras"
+    bl_label = "Selected Cameras"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    duration: bpy.props.IntProperty(
+        name="Duration",
+        description="Length of each shot in frames",
+        default=48,
+        min=1)
+    order: EnumProperty(
+        name="Order",
+        items=(
+            ('NAME', "Name", "Order the shots by camera name"),
+            ('PROPERTY', "Custom Property", "Order the shots by a custom property of the cameras"),
+        ),
+        default='NAME')
+    order_property: bpy.props.StringProperty(
+        name="Property",
+        description="Custom property holding the shot order",
+        default="shot_order")
+    channel: bpy.props.IntProperty(
+        name="Channel",
+        description="Lowest channel to add the shots in",
+        default=2,
+        min=1,
+        max=MAX_CHANNEL)
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'CAMERA' for obj in context.selected_objects)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.prop(self, "duration")
+        layout.prop(self, "channel")
+        layout.prop(self, "order")
+        if self.order == 'PROPERTY':
+            layout.prop(self, "order_property")
+
+    def execute(self, context):
+        scene = context.scene
+        prop_name = self.order_property if self.order == 'PROPERTY' else ""
+        cameras = sorted(
+            (obj for obj in context.selected_objects if obj.type == 'CAMERA'),
+            key=lambda camera: camera_order_key(camera, prop_name))
+
+        ed = scene.sequence_editor
+        allocator = ChannelAllocator.from_sequences(ed.sequences) if ed else ChannelAllocator()
+        plan = plan_sequential_strips(
+            [camera.name for camera in cameras], scene.frame_current, self.duration, allocator, self.channel)
+        if not plan:
+            return {'CANCELLED'}
+
+        scene.use_fake_user = True
+        apply_camera_strip_plan(scene, plan, get_intermediate_scene(scene))
+        self.report({'INFO'}, "Added %d camera strips" % len(plan))
+        return {'FINISHED'}
+
+
+# animated properties of a camera which jump at a cut
+CAMERA_CUT_PATHS = {
+    "location": 'LOCATION',
+    "delta_location": 'LOCATION',
+    "rotation_euler": 'ROTATION',
+    "delta_rotation_euler": 'ROTATION',
+    "rotation_quaternion": 'QUATERNION',
+    "delta_rotation_quaternion": 'QUATERNION',
+    "lens": 'LENS',
+    "ortho_scale": 'LOCATION',
+}
+
+
+def fcurve_keys(fcurve):
+    # key frames, values and constant interpolation flags as arrays
+    points = fcurve.keyframe_points
+    count = len(points)
+    co = np.empty(count * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    interpolation = np.empty(count, dtype=np.int32)
+    points.foreach_get("interpolation", interpolation)  # enums read as their values
+    constant = interpolation == 0  # 'CONSTANT' is the first interpolation
+    return co[0::2], co[1::2], constant
+
+
+def fcurve_cuts(frames, values, constant, threshold, max_gap=1.0):
+    # frames where the curve jumps by more than threshold within max_gap
+    # frames, or steps to a new value after a constant key
+    if len(frames) < 2:
+        return np.empty(0)
+    change = np.abs(np.diff(values))
+    jump = (change > threshold) & (np.diff(frames) <= max_gap + 1e-4)
+    step = constant[:-1] & (change > 1e-6)
+    return np.ceil(frames[1:][jump | step] - 1e-4)
+
+
+def camera_cut_frames(camera, thresholds, max_gap=1.0):
+    # sorted frames at which the animation of a camera object and its data cuts
+    cuts = [np.empty(0)]
+    for id_data in (camera, camera.data):
+        animation = id_data.animation_data
+        if not animation or not animation.action:
+            continue
+        for fcurve in animation.action.fcurves:
+            kind = CAMERA_CUT_PATHS.get(fcurve.data_path)
+            if kind is None or fcurve.mute:
+                continue
+            frames, values, constant = fcurve_keys(fcurve)
+            cuts.append(fcurve_cuts(frames, values, constant, thresholds[kind], max_gap))
+    return np.unique(np.concatenate(cuts)).astype(np.int64)
+
+
+def merge_close_cuts(cuts, start, end, min_length):
+    # cuts inside (start, end], dropping those less than min_length after the last kept one
+    kept = []
+    last = start
+    for cut in cuts[(cuts > start) & (cuts <= end)].tolist():
+        if cut - last >= min_length:
+            kept.append(cut)
+            last = cut
+    return kept
+
+
+class SEQUENCER_OT_split_camera_cuts(bpy.types.Operator):
+    """Add scene strips for the shots of a camera whose animation jumps at the cuts"""
+    bl_idname = "sequencer.split_camera_cuts"
+    bl_label = "Split Animated Camera"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    location_jump: bpy.props.FloatProperty(
+        name="Location Jump",
+        description="Movement within a frame which counts as a cut",
+        default=1.0,
+        min=0.0,
+        subtype='DISTANCE')
+    rotation_jump: bpy.props.FloatProperty(
+        name="Rotation Jump",
+        description="Rotation within a frame which counts as a cut",
+        default=float(np.radians(15.0)),
+        min=0.0,
+        subtype='ANGLE')
+    lens_jump: bpy.props.FloatProperty(
+        name="Focal Length Jump",
+        description="Focal length change within a frame which counts as a cut",
+        default=5.0,
+        min=0.0)
+    min_shot_length: bpy.props.IntProperty(
+        name="Shortest Shot",
+        description="Cuts closer than this to the previous cut are ignored",
+        default=4,
+        min=1)
+    channel: bpy.props.IntProperty(
+        name="Channel",
+        description="Lowest channel to add the shots in",
+        default=2,
+        min=1,
+        max=MAX_CHANNEL)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return (obj and obj.type == 'CAMERA') or context.scene.camera is not None
+
+    def execute(self, context):
+        scene = context.scene
+        obj = context.active_object
+        camera = obj if obj and obj.type == 'CAMERA' else scene.camera
+        thresholds = {
+            'LOCATION': self.location_jump,
+            'ROTATION': self.rotation_jump,
+            'QUATERNION': np.sin(self.rotation_jump / 2.0),
+            'LENS': self.lens_jump,
+        }
+        cuts = merge_close_cuts(
+            camera_cut_frames(camera, thresholds), scene.frame_start, scene.frame_end, self.min_shot_length)
+        frames = [scene.frame_start] + cuts
+
+        ed = scene.sequence_editor
+        allocator = ChannelAllocator.from_sequences(ed.sequences) if ed else ChannelAllocator()
+        plan = plan_camera_strips(
+            [(frame, camera.name) for frame in frames], allocator, self.channel,
+            last_length=scene.frame_end + 1 - frames[-1])
+        if not plan:
+            return {'CANCELLED'}
+        plan = [shot + ("%s.%03d" % (camera.name, i + 1),) for i, shot in enumerate(plan)]
+
+        scene.use_fake_user = True
+        apply_camera_strip_plan(scene, plan, get_intermediate_scene(scene))
+        self.report({'INFO'}, "Split %s into %d shots" % (camera.name, len(plan)))
+        return {'FINISHED'}
+
+
 class SEQUENCE_PT_convert_cameras(bpy.types.Operator):
     """Converts 'Bind Camera To Markers' to Scene Strips"""
     bl_label = "Convert Camera Markers"
     bl_idname = "sequencer.convert_cameras"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        scene = bpy.context.scene
+    dry_run: BoolProperty(
+        name="Dry Run",
+        description="Only report the planned strips, without changing the scene",
+        default=False)
 
-        if not bpy.context.scene.sequence_editor:  # create sequence, if missing
-            bpy.context.scene.sequence_editor_create()
-
-        marker_camera = []
-        marker_frame = []
-        marker_name = []
-        cam_marker = []
-        cnt = 0
-        mi = bpy.context.scene.timeline_markers.items()
-        for marker in scene.timeline_markers:  # find the cameras and their frame
+    def execute(self, context):
+        scene = context.scene
+        plan = plan_marker_conversion(scene)
+        if not plan:         # cancel if no cameras
+            return {'CANCELLED'}
 
-            if marker.camera:
-                cam_marker.insert(cnt, [marker.frame, marker.camera.name])  # mi[cnt][0]])
-                cnt += 1
+        if self.dry_run:
+            self.report({'INFO'}, "Planned %d strips in channels %d-%d" % (
+                len(plan), min(shot[3] for shot in plan), max(shot[3] for shot in plan)))
+            return {'FINISHED'}
 
-        if len(cam_marker) == 0:         # cancel if no cameras
-            return {'CANCELLED'}
+        apply_camera_strip_plan(scene, plan, get_intermediate_scene(scene))
+        return {'FINISHED'}
 
-        cam_marker = sorted(cam_marker, key=lambda mark: mark[0])  # Sort the markers after frame nr.
 
-        # add cameras to sequencer
-        cnt = 0  # counter
-        for i in cam_marker:
-            cf = cam_marker[cnt][0]
-            addSceneIn = cf
+def scene_strip_users():
+    # scene name: [(edit scene, strip)] of every scene strip showing it
+    users = {}
+    for scene in bpy.data.scenes:
+        if scene.sequence_editor:
+            for strip in scene.sequence_editor.sequences_all:
+                if strip.type == 'SCENE' and strip.scene is not None:
+                    users.setdefault(strip.scene.name, []).append((scene, strip))
+    return users
 
-            if cnt < len(cam_marker)-1:  # find out frame
-                addSceneOut = cam_marker[cnt+1][0]
-            else:
-                addSceneOut = addSceneIn+151  # last clip extented 30 fps*5 frames + an ekstra frame for the hack.
-                bpy.context.scene.frame_end = addSceneIn+150  # extent preview area or add scene strip may fail
 
-            addSceneChannel = 1          # attempt to add in this channel - if full, strips will be moved upwards
-            addSceneTlStart = cf
+def is_proven_legacy_copy(scene, strip_users):
+    # A legacy copy only when nothing but camera strips of its source scene
+    # use it. A user's own "Scene.001" has other users, or none at all.
+    if not is_legacy_copy(scene):
+        return False
+    if any(window.scene == scene for window in bpy.context.window_manager.windows):
+        return False
+    source = bpy.data.scenes[scene.name[:-4]]
+    strips = strip_users.get(scene.name, [])
+    return (bool(strips)
+            and scene.users - int(scene.use_fake_user) == len(strips)
+            and all(edit == source and strip.scene_camera is not None for edit, strip in strips))
+
+
+def plan_scene_cleanup():
+    # (legacy copies to move onto intermediates and remove, unused intermediates to remove)
+    strip_users = scene_strip_users()
+    copies = []
+    orphans = []
+    for scene in bpy.data.scenes:
+        source = scene.get(SOURCE_SCENE_PROP)
+        if isinstance(source, bpy.types.Scene):
+            if source.get(INTERMEDIATE_SCENE_PROP) != scene and scene.users - int(scene.use_fake_user) == 0:
+                orphans.append(scene.name)
+        elif is_proven_legacy_copy(scene, strip_users):
+            copies.append(scene.name)
+    return copies, orphans
+
+
+def repoint_legacy_strips(copies):
+    # move the camera strips of legacy copies onto the intermediate scene
+    count = 0
+    strip_users = scene_strip_users()
+    for name in copies:
+        for scene, strip in strip_users.get(name, []):
+            intermediate = get_intermediate_scene(scene)
+            start, end = strip.frame_final_start, strip.frame_final_end
+            intermediate.frame_end = max(intermediate.frame_end, end + 1)
+            strip.scene = intermediate
+            if (strip.frame_final_start, strip.frame_final_end) != (start, end):
+                strip.frame_final_start = start
+                strip.frame_final_end = end
+            count += 1
+    return count
+
+
+def remove_scenes(names):
+    removed = []
+    for name in names:
+        scene = bpy.data.scenes.get(name)
+        if scene and scene.users - int(scene.use_fake_user) == 0:
+            removed.append(name)
+            bpy.data.scenes.remove(scene)
+    return removed
+
+
+class SEQUENCER_OT_cleanup_intermediate_scenes(bpy.types.Operator):
+    """Move camera scene strips from old per-camera scene copies onto one intermediate scene per source and remove the unused copies"""
+    bl_idname = "sequencer.cleanup_intermediate_scenes"
+    bl_label = "Clean Up Scene Copies"
+    bl_options = {'REGISTER', 'UNDO'}
 
-            # Hack: adding a scene strip will make a hard cut one frame before preview area end.
-            bpy.context.scene.frame_end = bpy.context.scene.frame_end+1
+    shown = 20  # scenes listed in the confirmation
 
-            # add scene strip in current scene at in and out frame numbers
-            newScene = bpy.context.scene.sequence_editor.sequences.new_scene(cam_marker[cnt][1], bpy.context.scene, addSceneChannel, addSceneTlStart)
-            newScene.scene_camera = bpy.data.objects[cam_marker[cnt][1]]
-            newScene = bpy.context.scene.sequence_editor.sequences_all[newScene.name]
-            newScene.animation_offset_start = addSceneIn
-            newScene.frame_final_end = addSceneOut
-            newScene.frame_start = cf
-            cnt += 1
+    def invoke(self, context, event):
+        copies, orphans = plan_scene_cleanup()
+        if not copies and not orphans:
+            self.report({'INFO'}, "No scene copies to clean up")
+            return {'CANCELLED'}
+        self.removing = copies + orphans
+        return context.window_manager.invoke_props_dialog(self, width=400)
 
-            # Hack: remove the extra frame again of the preview area.
-            bpy.context.scene.frame_end = bpy.context.scene.frame_end-1
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text="These scenes will be removed:", icon="ERROR")
+        for name in self.removing[:self.shown]:
+            layout.label(text=name, icon="SCENE_DATA")
+        if len(self.removing) > self.shown:
+            layout.label(text="... and %d more" % (len(self.removing) - self.shown))
 
+    def execute(self, context):
+        copies, orphans = plan_scene_cleanup()
+        repointed = repoint_legacy_strips(copies)
+        removed = remove_scenes(copies + orphans)
+        invalidate_shot_index()
+        media_index.mark_dirty()
+        self.report({'INFO'}, "%d strips moved to intermediate scenes, removed scenes: %s" % (
+            repointed, ", ".join(removed) or "none"))
         return {'FINISHED'}
 
 
 class values():
     prev_scene_change = ""
+    playing = False
+    rendering = False
+    sampling = False  # frames set by the add-on itself, not switched on
+
+
+def scene_strip_target(strip):
+    # the scene Toggle Scene Strip switches to, and the camera to look through
+    camera = strip.scene_camera if strip.scene_input == 'CAMERA' else None
+    return source_scene_of(strip.scene), camera
 
 
 class SEQUENCER_OT_scene_change(bpy.types.Operator):
@@ -285,17 +1911,10 @@ class SEQUENCER_OT_scene_change(bpy.types.Operator):
             bpy.context.scene.sequence_editor_create()
         strip = act_strip(context)
         scene = bpy.context.scene
-        sequence = scene.sequence_editor
-
-        if strip != None:                                                               # save camera
-            if strip.type == "SCENE":
-                if sequence.sequences_all[strip.name].scene_input == 'CAMERA' and strip.scene_camera != None:
-                    camera = strip.scene_camera.name
-                    print(camera)
 
         if strip == None:                                                               # no active strip
             if values.prev_scene_change != "":                                           # a previous scene - go back
-                win = bpy.context.window_manager.windows[0]
+                win = context.window
                 win.scene = bpy.data.scenes[values.prev_scene_change]
                 return {"FINISHED"}
             elif values.prev_scene_change == "":                                         # no previous - do nothing
@@ -304,33 +1923,218 @@ class SEQUENCER_OT_scene_change(bpy.types.Operator):
         else:                                                                           # an active strip exists
 
             if strip.type != "SCENE" and values.prev_scene_change != "":                 # wrong strip type, but a previous scene - go back
-                win = bpy.context.window_manager.windows[0]
+                win = context.window
                 win.scene = bpy.data.scenes[values.prev_scene_change]
 
             elif strip.type == "SCENE":                                                 # correct strip type
-                strip_scene = bpy.context.scene.name
+                strip_scene, camera = scene_strip_target(strip)                         # not the intermediate scene
                 values.prev_scene_change = scene.name
 
                                                                                         # scene strip in 'Camera' and a camera is selected
 
-                if sequence.sequences_all[strip.name].scene_input == 'CAMERA' and strip.scene_camera != None:
-                    for area in bpy.context.screen.areas:
-                        if area.type == 'VIEW_3D':
-                            win = bpy.context.window_manager.windows[0]
-                            win.scene = bpy.data.scenes[strip_scene]
-                            bpy.context.scene.camera = bpy.data.objects[camera]         # select camera as view
-                            area.spaces.active.region_3d.view_perspective = 'CAMERA'    # use camera view
+                if camera != None:
+                    win = context.window
+                    if viewport_cache.window_viewports(win):
+                        win.scene = strip_scene
+                        strip_scene.camera = camera                                     # select camera as view
+                        follow_camera(strip_scene, win)                                 # use camera view
 
                 else:                                                                   # no scene strip in 'Camera' mode or a camera may not be selected
 
-                    strip_scene = bpy.context.scene.sequence_editor.active_strip.scene.name
-                    values.prev_scene_change = scene.name
-                    win = bpy.context.window_manager.windows[0]
-                    win.scene = bpy.data.scenes[strip_scene]
+                    win = context.window
+                    win.scene = strip_scene
 
         return {"FINISHED"}
 
 
+def normalize_path(filepath):
+    return os.path.normcase(os.path.normpath(bpy.path.abspath(filepath)))
+
+
+def media_key(strip):
+    # what a strip shows: a movie file, a sound file or a scene
+    if strip.type == 'MOVIE':
+        return ('MOVIE', normalize_path(strip.filepath))
+    if strip.type == 'SOUND' and strip.sound:
+        return ('SOUND', normalize_path(strip.sound.filepath))
+    if strip.type == 'SCENE' and strip.scene:
+        return ('SCENE', source_scene_of(strip.scene).name)
+    return None
+
+
+def source_frame_offset(strip):
+    # edit frame + offset = frame of the media or scene shown by the strip
+    if strip.type == 'SCENE':
+        return strip.scene.frame_start + strip.animation_offset_start - strip.frame_start
+    return -strip.frame_start
+
+
+class IntervalTree():
+    """Static centered interval tree of half-open (start, end, payload) intervals"""
+
+    def __init__(self, intervals):
+        self.root = self.build(list(intervals))
+
+    @classmethod
+    def build(cls, intervals):
+        if not intervals:
+            return None
+        starts = sorted(iv[0] for iv in intervals)
+        center = starts[len(starts) // 2]
+        left, right, here = [], [], []
+        for iv in intervals:
+            if iv[1] <= center:
+                left.append(iv)
+            elif iv[0] > center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        by_start = sorted(here, key=lambda iv: iv[0])
+        by_end = sorted(here, key=lambda iv: iv[1], reverse=True)
+        return (center, by_start, by_end, cls.build(left), cls.build(right))
+
+    def query(self, point):
+        node = self.root
+        while node:
+            center, by_start, by_end, left, right = node
+            if point < center:
+                for iv in by_start:
+                    if iv[0] > point:
+                        break
+                    yield iv
+                node = left
+            else:
+                for iv in by_end:
+                    if iv[1] <= point:
+                        break
+                    yield iv
+                node = right
+
+
+class MediaIndex():
+    """(scene name, strip name) locations of every strip by media key"""
+
+    def __init__(self):
+        self.locations = {}  # media key: {(scene name, strip name): None}
+        self.scene_keys = {}  # scene name: [(media key, strip name)]
+        self.trees = {}  # media key: IntervalTree of source frame ranges
+        self.dirty_scenes = set()
+        self.all_dirty = True
+
+    def mark_dirty(self, scene=None):
+        if scene is None:
+            self.all_dirty = True
+        else:
+            self.dirty_scenes.add(scene.name)
+
+    def drop_scene(self, scene_name):
+        for key, strip_name in self.scene_keys.pop(scene_name, ()):
+            self.trees.pop(key, None)
+            strips = self.locations.get(key)
+            if strips is not None:
+                strips.pop((scene_name, strip_name), None)
+                if not strips:
+                    del self.locations[key]
+
+    def add_scene(self, scene):
+        keys = self.scene_keys[scene.name] = []
+        if not scene.sequence_editor:
+            return
+        for strip in scene.sequence_editor.sequences_all:
+            key = media_key(strip)
+            if key is not None:
+                self.locations.setdefault(key, {})[(scene.name, strip.name)] = None
+                self.trees.pop(key, None)
+                keys.append((key, strip.name))
+
+    def refresh(self):
+        if self.all_dirty:
+            self.locations.clear()
+            self.scene_keys.clear()
+            self.trees.clear()
+            for scene in bpy.data.scenes:
+                self.add_scene(scene)
+            self.all_dirty = False
+        else:
+            for scene_name in self.dirty_scenes:
+                self.drop_scene(scene_name)
+                scene = bpy.data.scenes.get(scene_name)
+                if scene:
+                    self.add_scene(scene)
+        self.dirty_scenes.clear()
+
+    def lookup(self, key):
+        # (scene, strip) pairs still present in the file
+        self.refresh()
+        for scene_name, strip_name in self.locations.get(key, ()):
+            scene = bpy.data.scenes.get(scene_name)
+            strip = scene and scene.sequence_editor and scene.sequence_editor.sequences_all.get(strip_name)
+            if strip:
+                yield scene, strip
+
+    def tree(self, key):
+        # source frame ranges shown by the strips using key
+        tree = self.trees.get(key)
+        if tree is None:
+            intervals = []
+            for scene, strip in self.lookup(key):
+                offset = source_frame_offset(strip)
+                intervals.append((
+                    strip.frame_final_start + offset,
+                    strip.frame_final_end + offset,
+                    (scene.name, strip.name, offset),
+                ))
+            tree = self.trees[key] = IntervalTree(intervals)
+        return tree
+
+
+media_index = MediaIndex()
+
+
+def find_edit_frames(source, frame):
+    """(scene, strip, edit frame) for every strip showing frame of source.
+    Source is a scene or the path of a movie or sound file."""
+    if isinstance(source, bpy.types.Scene):
+        keys = [('SCENE', source_scene_of(source).name)]
+    else:
+        path = normalize_path(source)
+        keys = [('MOVIE', path), ('SOUND', path)]
+
+    found = []
+    media_index.refresh()
+    for key in keys:
+        for start, end, (scene_name, strip_name, offset) in media_index.tree(key).query(frame):
+            scene = bpy.data.scenes.get(scene_name)
+            strip = scene and scene.sequence_editor and scene.sequence_editor.sequences_all.get(strip_name)
+            if strip:
+                found.append((scene, strip, int(frame - offset)))
+    found.sort(key=lambda hit: (hit[0].name, hit[2], hit[1].channel))
+    return found
+
+
+def match_frame_target(scene, active, frame):
+    """(scene, frame, strip) Match Frame jumps to from frame of the active
+    strip, with strip None for a scene strip, or None. The inverse of
+    find_edit_frames."""
+    if not active.frame_final_start <= frame <= active.frame_final_end:
+        return None
+    source_frame = frame + source_frame_offset(active)
+
+    if active.type == "MOVIE" or active.type == "SOUND":
+        for sce, strip in media_index.lookup(media_key(active)):
+            if sce == scene:
+                continue
+            frame_current = source_frame - source_frame_offset(strip)
+            if strip.frame_final_start <= frame_current <= strip.frame_final_end:
+                return sce, int(frame_current), strip
+
+    elif active.type == "SCENE" and active.scene:
+        source = source_scene_of(active.scene)
+        if source != scene:
+            return source, int(source_frame), None
+    return None
+
+
 class SEQUENCER_OT_match_frame(bpy.types.Operator):
     """Jump to a matching frame in a different scene."""
 
@@ -339,97 +2143,1682 @@ class SEQUENCER_OT_match_frame(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
 
     def execute(self, context):
-        current_scene = bpy.context.scene
-        current_frame = current_scene.frame_current
+        current_scene = context.scene
         try:
             active = current_scene.sequence_editor.active_strip
         except AttributeError:
             return {"CANCELLED"}
         if not active:
             return {"CANCELLED"}
-        frame_start = active.frame_start + active.frame_offset_start
-        frame_end = (
-            int(active.frame_start + active.frame_offset_start + active.frame_final_duration)
-        )
+        target = match_frame_target(current_scene, active, current_scene.frame_current)
+        if not target:
+            return {"FINISHED"}
+
+        sce, frame, strip = target
+        context.window.scene = sce
+        sce.frame_current = frame
+        if strip:
+            bpy.ops.sequencer.select_all(action="DESELECT")
+            strip.select = True
+            sce.sequence_editor.active_strip = strip
+            bpy.ops.sequencer.view_all()
+
+        elif active.scene_input == "CAMERA" and active.scene_camera:
+            if viewport_cache.window_viewports(context.window):
+                sce.camera = active.scene_camera  # Select camera as view
+                follow_camera(sce, context.window)  # Use camera view
+        return {"FINISHED"}
+
+
+class SEQUENCER_OT_find_edit_uses(bpy.types.Operator):
+    """List every frame in the edits showing the current source frame"""
 
-        if current_frame >= frame_start and current_frame <= frame_end:
-            find_frame = current_frame - active.frame_start
+    bl_idname = "sequencer.find_edit_uses"
+    bl_label = "Find Edit Uses"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        scene = context.scene
+        strip = act_strip(context)
+        if context.space_data and context.space_data.type == 'SEQUENCE_EDITOR' \
+                and strip and strip.type in {'MOVIE', 'SOUND'}:
+            source = strip.filepath if strip.type == 'MOVIE' else strip.sound.filepath
+            frame = scene.frame_current + source_frame_offset(strip)
+            title = "%s, frame %d" % (bpy.path.basename(source), frame)
         else:
-            find_frame = 0
-        for sce in bpy.data.scenes:
-            seq = sce.sequence_editor
-
-            if seq and (active.type == "MOVIE" or active.type == "SOUND"):
-                for strip in seq.sequences_all:
-                    if strip.type == active.type == "MOVIE":
-                        strip_file_path = strip.filepath
-                        active_file_path = active.filepath
-                    elif strip.type == active.type == "SOUND":
-                        strip_file_path = strip.sound.filepath
-                        active_file_path = active.sound.filepath
-                    if (
-                        find_frame
-                        and current_scene.name != sce.name
-                        and active.type == strip.type
-                        and active_file_path == strip_file_path
-                    ):
-                        frame_current = find_frame + strip.frame_start
-                        frame_start = strip.frame_start + strip.frame_offset_start
-                        frame_end = (
-                            strip.frame_start
-                            + strip.frame_offset_start
-                            + strip.frame_final_duration
-                        )
-                        print("frame_current " + str(frame_current))
-                        print("frame_start " + str(frame_start))
-                        print("frame_end " + str(frame_end))
-                        if frame_current >= frame_start and frame_current <= frame_end:
-                            win = bpy.context.window_manager.windows[0]
-                            win.scene = bpy.data.scenes[sce.name]
-                            bpy.context.scene.frame_current = frame_current
-                            bpy.ops.sequencer.select_all(action="DESELECT")
-                            strip.select = True
-                            bpy.context.scene.sequence_editor.active_strip = strip
-                            bpy.ops.sequencer.view_all()
-                            break
-                            break
-            elif active.type == "SCENE":
-                scene_name = active.scene.name
-                if scene_name == sce.name:
-                    camera_name = ""
-                    if active.scene_input == "CAMERA":
-                        if active.scene_camera:
-                            camera_name = active.scene_camera.name
-                    if find_frame and current_scene.name != sce.name:
-                        frame_current = find_frame
-                        print("frame_current " + str(frame_current))
-                        win = bpy.context.window_manager.windows[0]
-                        win.scene = bpy.data.scenes[sce.name]
-                        bpy.context.scene.frame_current = int(frame_current)
-
-                        if camera_name:
-                            for area in bpy.context.screen.areas:
-                                if area.type == "VIEW_3D":
-                                    bpy.context.scene.camera = bpy.data.objects[
-                                        camera_name
-                                    ]  # Select camera as view
-                                    area.spaces.active.region_3d.view_perspective = (
-                                        "CAMERA"  # Use camera view
-                                    )
-                                    break
-                        break
-                        break
-        return {"FINISHED"}
+            source = source_scene_of(scene)
+            frame = scene.frame_current
+            title = "%s, frame %d" % (source.name, frame)
+
+        found = find_edit_frames(source, frame)
+        if not found:
+            self.report({'INFO'}, "No edit shows " + title)
+            return {'CANCELLED'}
+
+        def draw(menu, context):
+            for edit_scene, edit_strip, edit_frame in found:
+                op = menu.layout.operator(
+                    "sequencer.goto_edit_frame",
+                    text="%s: %s @ %d" % (edit_scene.name, edit_strip.name, edit_frame),
+                    icon="SEQUENCE")
+                op.scene_name = edit_scene.name
+                op.strip_name = edit_strip.name
+                op.frame = edit_frame
+
+        context.window_manager.popup_menu(draw, title=title, icon="VIEWZOOM")
+        return {'FINISHED'}
+
+
+class SEQUENCER_OT_goto_edit_frame(bpy.types.Operator):
+    """Show a strip and frame of an edit scene"""
+
+    bl_idname = "sequencer.goto_edit_frame"
+    bl_label = "Go to Edit Frame"
+    bl_options = {"REGISTER", "UNDO"}
+
+    scene_name: bpy.props.StringProperty()
+    strip_name: bpy.props.StringProperty()
+    frame: bpy.props.IntProperty()
+
+    def execute(self, context):
+        scene = bpy.data.scenes.get(self.scene_name)
+        if not scene or not scene.sequence_editor:
+            return {'CANCELLED'}
+        strip = scene.sequence_editor.sequences_all.get(self.strip_name)
+        context.window.scene = scene
+        scene.frame_current = self.frame
+        if strip:
+            scene.sequence_editor.active_strip = strip
+        return {'FINISHED'}
+
+
+# Background workers
+
+# Renders run in separate "blender -b" processes on a saved copy of the file,
+# so the UI stays responsive and all cores are used.
+RENDER_WORKER_SCRIPT = """
+import bpy, json, sys
+job = json.loads(sys.argv[sys.argv.index("--") + 1])
+scene = bpy.data.scenes[job["scene"]]
+for marker in scene.timeline_markers:
+    marker.camera = None
+scene.camera = bpy.data.objects[job["camera"]]
+render = scene.render
+render.use_sequencer = False
+render.image_settings.file_format = job["file_format"]
+for path, values in job.get("settings", {}).items():
+    struct = scene.path_resolve(path)
+    for attr, value in values.items():
+        setattr(struct, attr, value)
+if "resolution" in job:
+    render.resolution_x, render.resolution_y = job["resolution"]
+if "percentage" in job:
+    render.resolution_percentage = job["percentage"]
+render.use_stamp = "stamp_note" in job
+if render.use_stamp:
+    for attr in dir(render):
+        if attr.startswith("use_stamp_") and attr not in {"use_stamp_note", "use_stamp_labels"}:
+            setattr(render, attr, False)
+    render.use_stamp_note = True
+    render.use_stamp_labels = False
+    render.stamp_note_text = job["stamp_note"]
+render.filepath = job["filepath"]
+if "frame" in job:
+    scene.frame_set(job["frame"])
+    bpy.ops.render.render(write_still=True, scene=scene.name)
+else:
+    scene.frame_start = job["frame_start"]
+    scene.frame_end = job["frame_end"] - 1
+    bpy.ops.render.render(animation=True, scene=scene.name)
+"""
+
+
+def worker_threads(workers):
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def worker_command(blend_path, job, threads):
+    return [
+        bpy.app.binary_path, "-b", "--factory-startup", blend_path,
+        "-t", str(threads),
+        "--python-exit-code", "1",  # an exception in the script fails the job
+        "--python-expr", RENDER_WORKER_SCRIPT,
+        "--", json.dumps(job),
+    ]
+
+
+def job_output_complete(job):
+    # a job also fails when it exits cleanly without writing all its frames
+    directory = os.path.dirname(job["filepath"])
+    expected = 1 if "frame" in job else job["frame_end"] - job["frame_start"]
+    return os.path.isdir(directory) and len(frame_files(directory)) >= expected
+
+
+def save_worker_copy():
+    # workers read a copy of the file as it is now, saved or not
+    directory = tempfile.mkdtemp(prefix="scene_strip_tools_")
+    filepath = os.path.join(directory, "workers.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True, check_existing=False)
+    return filepath
+
+
+class WorkerPool():
+    """Runs jobs in background Blender processes, a few at a time"""
+
+    def __init__(self, blend_path, workers):
+        self.blend_path = blend_path
+        self.workers = max(1, workers)
+        self.threads = worker_threads(self.workers)
+        self.pending = deque()  # (key, job)
+        self.running = []  # (key, job, process, log)
+        self.total = 0
+
+    def add(self, key, job, log_path):
+        self.pending.append((key, job, log_path))
+        self.total += 1
+
+    def poll(self):
+        # start what fits, return [(key, succeeded)] for jobs finished since last time
+        finished = []
+        for item in list(self.running):
+            key, job, process, log = item
+            if process.poll() is not None:
+                log.close()
+                self.running.remove(item)
+                finished.append((key, process.returncode == 0 and job_output_complete(job)))
+        while self.pending and len(self.running) < self.workers:
+            key, job, log_path = self.pending.popleft()
+            log = open(log_path, "w")
+            process = subprocess.Popen(
+                worker_command(self.blend_path, job, self.threads),
+                stdout=log, stderr=subprocess.STDOUT)
+            self.running.append((key, job, process, log))
+        return finished
+
+    def done(self):
+        return not self.pending and not self.running
+
+    def cancel(self):
+        self.pending.clear()
+        for key, job, process, log in self.running:
+            process.kill()
+            process.wait()
+            log.close()
+        self.running.clear()
+
+    def cleanup(self):
+        shutil.rmtree(os.path.dirname(self.blend_path), ignore_errors=True)
+
+
+class WorkerOperator():
+    """Modal timer plumbing shared by the operators rendering in a WorkerPool"""
+
+    _timer = None
+    _pool = None
+    status = "Rendering"
+
+    def start_workers(self, context, pool):
+        self._pool = pool
+        self.failed = []
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, pool.total)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._pool.cancel()
+            self.finish_workers(context)
+            self.report({'WARNING'}, self.status + " cancelled")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        for key, succeeded in self._pool.poll():
+            if succeeded:
+                self.job_finished(context, key)
+            else:
+                self.failed.append(key)
+        done = self._pool.total - len(self._pool.pending) - len(self._pool.running)
+        context.window_manager.progress_update(done)
+        context.workspace.status_text_set("%s: %d of %d" % (self.status, done, self._pool.total))
+
+        if self._pool.done():
+            self.finish_workers(context)
+            if self.failed:
+                self.report({'WARNING'}, "%s failed for: %s" % (self.status, ", ".join(map(str, self.failed))))
+            return self.all_finished(context)
+        return {'PASS_THROUGH'}
+
+    def finish_workers(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self._pool.cleanup()
+
+    def job_finished(self, context, key):
+        pass
+
+    def all_finished(self, context):
+        return {'FINISHED'}
+
+
+# Shot hashing
+
+def hash_floats(digest, values):
+    digest.update(array.array('d', values).tobytes())
+
+
+def hash_action(digest, action):
+    if action is None:
+        return
+    for fcurve in action.fcurves:
+        digest.update(("%s[%d]" % (fcurve.data_path, fcurve.array_index)).encode())
+        points = fcurve.keyframe_points
+        coords = array.array('f', bytes(4 * 2 * len(points)))
+        for attr in ("co", "handle_left", "handle_right"):
+            points.foreach_get(attr, coords)
+            digest.update(coords.tobytes())
+        modes = array.array('i', bytes(4 * len(points)))
+        points.foreach_get("interpolation", modes)
+        digest.update(modes.tobytes())
+
+
+# properties left out of the render input hashes: evaluated state which
+# follows the playhead, user counts, selection and other UI state
+HASH_SKIPPED_PROPS = {
+    "rna_type", "matrix_world", "matrix_local", "matrix_basis", "matrix_channel",
+    "bound_box", "dimensions", "users", "users_collection", "users_scene", "children",
+    "children_recursive", "original", "is_evaluated", "session_uid", "tag",
+    "is_runtime_data", "preview", "use_fake_user", "pixels",
+}
+HASH_SKIPPED_STRUCT_PROPS = {
+    "PoseBone": {"matrix", "head", "tail"},  # the evaluated pose
+}
+HASH_DEPTH = 3  # nesting of plain structs followed inside one ID
+HASH_COLLECTION_LIMIT = 64  # longer collections only hash their length and coordinates
+
+
+def hash_value(digest, value):
+    if isinstance(value, set):  # enum flags
+        value = sorted(value)
+    elif hasattr(value, "__len__") and not isinstance(value, str):
+        value = tuple(tuple(item) if hasattr(item, "__len__") else item for item in value)
+    digest.update(repr(value).encode())
+
+
+def hash_large_collection(digest, prop, items):
+    # vertices, shape key and curve points hash their coordinates in bulk
+    digest.update(str(len(items)).encode())
+    co = prop.fixed_type.properties.get("co")
+    if co is not None and co.type == 'FLOAT' and len(items):
+        coords = array.array('f', bytes(4 * max(1, co.array_length) * len(items)))
+        items.foreach_get("co", coords)
+        digest.update(coords.tobytes())
+
+
+def animated_paths(id_block):
+    # Data paths of an ID driven by its actions or drivers. The depsgraph
+    # writes their values at the current frame back to the ID, so they are
+    # hashed through the actions and drivers instead.
+    anim = getattr(id_block, "animation_data", None)
+    if anim is None:
+        return set()
+    actions = [anim.action]
+    actions += [strip.action for track in anim.nla_tracks for strip in track.strips]
+    paths = {fcurve.data_path for action in actions if action for fcurve in action.fcurves}
+    paths.update(fcurve.data_path for fcurve in anim.drivers)
+    return paths
+
+
+def item_path(item, fallback):
+    try:
+        return item.path_from_id()
+    except (AttributeError, ValueError):
+        return fallback
+
+
+def hash_id(digest, id_block, seen):
+    # an ID and every ID it points to, each hashed once
+    if id_block is None:
+        digest.update(b"-")
+        return
+    digest.update(id_block.name.encode())
+    key = id_block.as_pointer()
+    if key in seen:
+        return
+    seen.add(key)
+    if isinstance(id_block, bpy.types.Action):
+        hash_action(digest, id_block)
+    else:
+        hash_rna(digest, id_block, seen, animated_paths(id_block))
+
+
+def hash_rna(digest, struct, seen, animated, path="", depth=0):
+    # The stored RNA values of a struct: transforms, modifiers, materials and
+    # their node trees, lights, shape keys and so on, as opposed to the
+    # evaluated state at the current frame. `path` is the data path of the
+    # struct inside its ID, to leave out the animated values.
+    skipped = HASH_SKIPPED_STRUCT_PROPS.get(struct.bl_rna.identifier, ())
+    for prop in struct.bl_rna.properties:
+        name = prop.identifier
+        if (name in HASH_SKIPPED_PROPS or name in skipped or name.startswith("select")
+                or (name.startswith("show_") and name != "show_render")):
+            continue
+        prop_path = path + "." + name if path else name
+        if prop_path in animated:
+            continue
+        try:
+            value = getattr(struct, name)
+        except (AttributeError, RuntimeError, TypeError):
+            continue
+        if prop.type == 'POINTER':
+            if value is None or isinstance(value, bpy.types.ID):
+                hash_id(digest, value, seen)
+            elif depth < HASH_DEPTH:
+                hash_rna(digest, value, seen, animated, prop_path, depth + 1)
+        elif prop.type == 'COLLECTION':
+            if len(value) > HASH_COLLECTION_LIMIT or depth >= HASH_DEPTH:
+                hash_large_collection(digest, prop, value)
+                continue
+            for index, item in enumerate(value):
+                if isinstance(item, bpy.types.ID):
+                    hash_id(digest, item, seen)
+                else:
+                    hash_rna(digest, item, seen, animated,
+                             item_path(item, "%s[%d]" % (prop_path, index)), depth + 1)
+        else:
+            hash_value(digest, value)
+
+
+def scene_state_hash(scene):
+    # what the objects of a scene look like, from their data, materials,
+    # modifiers, animation and the world
+    digest = hashlib.sha1()
+    seen = set()
+    digest.update(scene.render.engine.encode())
+    hash_id(digest, scene.world, seen)
+    for obj in sorted(scene.objects, key=attrgetter("name")):
+        hash_id(digest, obj, seen)
+    return digest.hexdigest()
+
+
+def shot_hash(strip, state_hash, settings=()):
+    # inputs of one camera scene strip render: camera, its animation, the
+    # frames shown, the source scene state and the render settings
+    digest = hashlib.sha1(state_hash.encode())
+    hash_id(digest, strip.scene_camera, set())
+
+    offset = source_frame_offset(strip)
+    render = strip.scene.render
+    hash_floats(digest, (strip.frame_final_start + offset, strip.frame_final_end + offset,
+                         render.resolution_x, render.resolution_y, render.fps, render.fps_base))
+    digest.update(repr(tuple(settings)).encode())
+    return digest.hexdigest()
+
+
+def shot_jobs(scene, strips, settings):
+    # (strip, hash, job) for every camera scene strip, hashing each source once
+    state_hashes = {}
+    shots = []
+    for strip in strips:
+        source = source_scene_of(strip.scene)
+        if source.name not in state_hashes:
+            state_hashes[source.name] = scene_state_hash(source)
+        digest = shot_hash(strip, state_hashes[source.name], settings)
+        offset = int(source_frame_offset(strip))
+        job = {
+            "scene": strip.scene.name,
+            "camera": strip.scene_camera.name,
+            "frame_start": strip.frame_final_start + offset,
+            "frame_end": strip.frame_final_end + offset,
+        }
+        shots.append((strip, digest, job))
+    return shots
+
+
+def camera_strips(scene):
+    ed = scene.sequence_editor
+    if not ed:
+        return []
+    return [seq for seq in ed.sequences_all if is_camera_strip(seq, scene)]
+
+
+def blend_relative_dir(name):
+    # next to the .blend file, or in the temp folder for unsaved files
+    if bpy.data.filepath:
+        return bpy.path.abspath("//" + name)
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+IMAGE_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".exr", ".tif", ".tiff", ".bmp", ".webp",
+    ".tga", ".dpx", ".hdr", ".jp2", ".j2c", ".cin", ".rgb",
+}
+
+
+def frame_files(directory):
+    return sorted(name for name in os.listdir(directory)
+                  if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+
+
+# Preview proxies
+
+PROXY_OF_PROP = "scene_strip_tools_proxy_of"
+
+
+def proxy_strips(scene):
+    ed = scene.sequence_editor
+    if not ed:
+        return {}
+    return {seq.get(PROXY_OF_PROP): seq for seq in ed.sequences_all if PROXY_OF_PROP in seq}
+
+
+def add_proxy_strip(scene, strip, directory, allocator, top):
+    # an image sequence of the rendered proxy frames, as many channels above
+    # the top camera strip channel as the strip is above channel 0
+    files = frame_files(directory)
+    if not files:
+        return None
+    sequences = scene.sequence_editor.sequences
+    channel = allocator.allocate(strip.frame_final_start, strip.frame_final_end, top + strip.channel)
+    if channel is None:
+        return None
+    proxy = sequences.new_image(
+        "Proxy " + strip.name, os.path.join(directory, files[0]), channel, strip.frame_final_start)
+    for name in files[1:]:
+        proxy.elements.append(name)
+    proxy.frame_final_end = strip.frame_final_end
+    proxy.blend_type = 'REPLACE'
+    proxy.mute = not scene.asset_manager.use_preview_proxies
+    proxy[PROXY_OF_PROP] = strip.name
+    return proxy
+
+
+def proxy_in_place(proxy, strip, directory, top):
+    # the proxy shows the rendered frames over the current range of its strip,
+    # as many channels above the top camera strip as add_proxy_strip puts it
+    return (proxy is not None
+            and os.path.normpath(bpy.path.abspath(proxy.directory)) == os.path.normpath(directory)
+            and proxy.frame_final_start == strip.frame_final_start
+            and proxy.frame_final_end == strip.frame_final_end
+            and proxy.channel >= top + strip.channel)
+
+
+def set_proxies_muted(scene, mute):
+    for proxy in proxy_strips(scene).values():
+        if proxy.mute != mute:
+            proxy.mute = mute
+
+
+class SEQUENCER_OT_render_preview_proxies(WorkerOperator, bpy.types.Operator):
+    """Render changed camera scene strips to low resolution proxies in background processes"""
+    bl_idname = "sequencer.render_preview_proxies"
+    bl_label = "Render Preview Proxies"
+    bl_options = {'REGISTER'}
+
+    status = "Rendering preview proxies"
+
+    percentage: bpy.props.IntProperty(
+        name="Resolution %",
+        description="Proxy resolution, in percent of the scene resolution",
+        default=25,
+        min=1,
+        max=100,
+        subtype='PERCENTAGE')
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Background Blender processes rendering at the same time",
+        default=max(1, (os.cpu_count() or 2) // 2),
+        min=1)
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context):
+        scene = context.scene
+        strips = camera_strips(scene)
+        if not strips:
+            self.report({'WARNING'}, "No camera scene strips")
+            return {'CANCELLED'}
+
+        existing = proxy_strips(scene)
+        for name in set(existing) - {strip.name for strip in strips}:
+            scene.sequence_editor.sequences.remove(existing.pop(name))
+
+        root = blend_relative_dir("scene_strip_proxies")
+        self.shots = {}
+        self.top = max(strip.channel for strip in strips)
+        swaps = []
+        jobs = []
+        for strip, digest, job in shot_jobs(scene, strips, ("proxy", self.percentage)):
+            directory = os.path.join(root, bpy.path.clean_name(strip.name) + "_" + digest[:16])
+            self.shots[strip.name] = directory
+            if os.path.exists(os.path.join(directory, ".done")):
+                if not proxy_in_place(existing.get(strip.name), strip, directory, self.top):
+                    swaps.append(strip.name)
+                continue
+            shutil.rmtree(directory, ignore_errors=True)  # frames of an unfinished render
+            os.makedirs(directory)
+            job.update(
+                percentage=self.percentage,
+                file_format='JPEG',
+                filepath=os.path.join(directory, "######"))
+            jobs.append((strip.name, job))
+
+        # proxies about to be replaced don't take up channel space
+        replaced = set(swaps) | {name for name, job in jobs}
+        self.allocator = ChannelAllocator(
+            (seq.channel, seq.frame_final_start, seq.frame_final_end)
+            for seq in scene.sequence_editor.sequences
+            if seq.get(PROXY_OF_PROP) not in replaced)
+        for strip_name in swaps:
+            self.swap_proxy(scene, strip_name)
+
+        if not jobs:
+            self.report({'INFO'}, "Preview proxies are up to date")
+            return {'FINISHED'}
+
+        pool = WorkerPool(save_worker_copy(), self.workers)
+        for key, job in jobs:
+            pool.add(key, job, os.path.join(self.shots[key], "render.log"))
+        return self.start_workers(context, pool)
+
+    def swap_proxy(self, scene, strip_name):
+        strip = scene.sequence_editor.sequences_all.get(strip_name)
+        if strip is None:
+            return
+        old = proxy_strips(scene).get(strip_name)
+        if old:
+            scene.sequence_editor.sequences.remove(old)
+        add_proxy_strip(scene, strip, self.shots[strip_name], self.allocator, self.top)
+
+    def job_finished(self, context, strip_name):
+        open(os.path.join(self.shots[strip_name], ".done"), "w").close()
+        self.swap_proxy(context.scene, strip_name)
+
+    def all_finished(self, context):
+        if not self.failed:
+            self.report({'INFO'}, "Rendered %d preview proxies" % self._pool.total)
+        return {'FINISHED'}
+
+
+# Parallel shot rendering
+
+def edit_shots(scene):
+    # (edit start, edit end, strip) of the visible part of each shot, in edit order
+    index = get_shot_index(scene)
+    sequences = scene.sequence_editor.sequences_all
+    shots = []
+    for start, end, strip_name in zip(index.starts, index.ends, index.strips):
+        strip = sequences.get(strip_name)
+        if strip:
+            shots.append((start, end, strip))
+    return shots
+
+
+def shot_file_format(scene):
+    # shots are rendered as image sequences, also when the edit goes to a movie
+    file_format = scene.render.image_settings.file_format
+    return 'PNG' if file_format in {'FFMPEG', 'AVI_JPEG', 'AVI_RAW'} else file_format
+
+
+def render_output_dir(scene):
+    filepath = bpy.path.abspath(scene.render.filepath)
+    return filepath if filepath.endswith(("/", "\\")) else os.path.dirname(filepath)
+
+
+def stitch_shots(shots, directory):
+    # Link, or copy, the shot frames into one sequence numbered by edit frame.
+    # Frames of earlier runs are removed, so the folder never looks complete
+    # when it isn't. Returns the frame count and the (start, end) edit ranges
+    # left without frames.
+    os.makedirs(directory, exist_ok=True)
+    written = set()
+    missing = []
+    for start, end, shot_dir in shots:
+        files = frame_files(shot_dir) if shot_dir else []
+        for frame, name in zip(range(start, end), files):
+            source = os.path.join(shot_dir, name)
+            target_name = "%06d%s" % (frame, os.path.splitext(name)[1])
+            target = os.path.join(directory, target_name)
+            if os.path.lexists(target):
+                os.remove(target)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+            written.add(target_name)
+        if len(files) < end - start:
+            missing.append((start + len(files), end))
+    for name in frame_files(directory):
+        if name not in written:
+            os.remove(os.path.join(directory, name))
+    return len(written), missing
+
+
+def render_settings(scene):
+    # The render settings which change the pixels of a shot, by their path
+    # from the scene. Jobs carry the settings of the edit scene, as the
+    # intermediate scenes are copies frozen when they were created.
+    render = scene.render
+    image = render.image_settings
+    view = scene.view_settings
+    settings = {
+        "render": {name: getattr(render, name) for name in (
+            "engine", "resolution_x", "resolution_y", "resolution_percentage",
+            "pixel_aspect_x", "pixel_aspect_y", "film_transparent", "use_compositing")},
+        "render.image_settings": {name: getattr(image, name) for name in (
+            "color_mode", "color_depth", "quality", "compression")},
+        "view_settings": {name: getattr(view, name) for name in (
+            "view_transform", "look", "exposure", "gamma")},
+    }
+    if render.engine == 'CYCLES' and hasattr(scene, "cycles"):
+        settings["cycles"] = {"samples": scene.cycles.samples}
+    elif render.engine.startswith('BLENDER_EEVEE'):
+        settings["eevee"] = {"taa_render_samples": scene.eevee.taa_render_samples}
+    return settings
+
+
+def render_settings_key(scene):
+    return (json.dumps(render_settings(scene), sort_keys=True),)
+
+
+class ShotCache():
+    """Rendered shot frames on disk by shot hash, evicting the least recently used"""
+
+    def __init__(self, directory, size_limit):
+        self.directory = directory
+        self.size_limit = size_limit
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def lookup(self, digest):
+        done = os.path.join(self.path(digest), ".done")
+        if os.path.exists(done):
+            os.utime(done)  # recently used
+            return self.path(digest)
+        return None
+
+    def prepare(self, digest):
+        path = self.path(digest)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+    def commit(self, digest):
+        open(os.path.join(self.path(digest), ".done"), "w").close()
+
+    def evict(self, keep=()):
+        # drop the oldest entries until the cache fits, unfinished ones first
+        if not os.path.isdir(self.directory):
+            return 0
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            done = os.path.join(path, ".done")
+            used = os.path.getmtime(done) if os.path.exists(done) else 0.0
+            entries.append((used, size, name, path))
+        total = sum(entry[1] for entry in entries)
+        removed = 0
+        for used, size, name, path in sorted(entries):
+            if total <= self.size_limit:
+                break
+            if name in keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def get_shot_cache():
+    directory = bpy.path.abspath(get_preference("cache_directory"))
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), "scene_strip_tools_cache")
+    return ShotCache(directory, get_preference("cache_size_limit") * 1024 ** 3)
+
+
+class SEQUENCER_OT_render_shots(WorkerOperator, bpy.types.Operator):
+    """Render the camera shots of the edit in parallel background processes and join them in edit order"""
+    bl_idname = "sequencer.render_shots"
+    bl_label = "Render Shots in Parallel"
+    bl_options = {'REGISTER'}
+
+    status = "Rendering shots"
+
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Background Blender processes rendering at the same time, 0 uses the add-on preferences",
+        default=0,
+        min=0)
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context):
+        scene = context.scene
+        shots = edit_shots(scene)
+        if not shots:
+            self.report({'WARNING'}, "No camera scene strips")
+            return {'CANCELLED'}
+
+        self.output = render_output_dir(scene)
+        self.cache = get_shot_cache()
+        file_format = shot_file_format(scene)
+        settings = render_settings(scene)
+        settings_key = render_settings_key(scene)
+        state_hashes = {}
+        self.shots = []
+        self.digests = []
+        self.hits = 0
+        jobs = []
+        for i, (start, end, strip) in enumerate(shots):
+            source = source_scene_of(strip.scene)
+            if source.name not in state_hashes:
+                state_hashes[source.name] = scene_state_hash(source)
+            offset = int(source_frame_offset(strip))
+            digest = shot_hash(strip, state_hashes[source.name],
+                               ("shot", start + offset, end + offset, file_format) + settings_key)
+            shot_dir = self.cache.lookup(digest)
+            if shot_dir:
+                self.hits += 1
+            else:
+                shot_dir = self.cache.prepare(digest)
+                jobs.append((i, {
+                    "scene": strip.scene.name,
+                    "camera": strip.scene_camera.name,
+                    "frame_start": start + offset,
+                    "frame_end": end + offset,
+                    "file_format": file_format,
+                    "settings": settings,
+                    "filepath": os.path.join(shot_dir, "######"),
+                }, os.path.join(shot_dir, "render.log")))
+            self.shots.append((start, end, shot_dir))
+            self.digests.append(digest)
+
+        if not jobs:
+            self.failed = []
+            return self.all_finished(context)
+        pool = WorkerPool(save_worker_copy(), self.workers or get_preference("render_workers"))
+        for i, job, log_path in jobs:
+            pool.add(i, job, log_path)
+        return self.start_workers(context, pool)
+
+    def job_finished(self, context, i):
+        self.cache.commit(self.digests[i])
+
+    def all_finished(self, context):
+        failed = set(self.failed)
+        shots = [(start, end, None if i in failed else shot_dir)
+                 for i, (start, end, shot_dir) in enumerate(self.shots)]
+        frames, missing = stitch_shots(shots, os.path.join(self.output, "edit"))
+        evicted = self.cache.evict(keep=set(self.digests))
+        misses = len(self.shots) - self.hits
+        self.report({'INFO'}, "Rendered %d of %d shots (%d cached, %d rendered, %d evicted), %d frames in %s" % (
+            len(self.shots) - len(failed), len(self.shots), self.hits, misses, evicted, frames,
+            os.path.join(self.output, "edit")))
+        if missing:
+            self.report({'WARNING'}, "No frames for: " + ", ".join(
+                "%d-%d" % (start, end - 1) for start, end in missing))
+        return {'FINISHED'}
+
+
+# Storyboard contact sheets
+
+def storyboard_frame(scene, strip, choice):
+    # the edit frame representing a shot
+    start, end = strip.frame_final_start, strip.frame_final_end
+    if choice == 'FIRST':
+        return start
+    if choice == 'MARKER':
+        frames = [marker.frame for marker in scene.timeline_markers
+                  if start <= marker.frame < end and not is_baked_marker(marker)]
+        if frames:
+            return min(frames)
+    return (start + end - 1) // 2
+
+
+def load_pixels(filepath):
+    image = bpy.data.images.load(filepath)
+    width, height = image.size
+    channels = image.channels
+    pixels = np.empty(width * height * channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    pixels = pixels.reshape(height, width, channels)
+    if channels == 4:
+        return pixels
+    rgba = np.ones((height, width, 4), dtype=np.float32)
+    rgba[..., :min(channels, 3)] = pixels[..., :3]
+    return rgba
+
+
+def save_pixels(pixels, filepath):
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.new(os.path.basename(filepath), width, height, alpha=True)
+    image.pixels.foreach_set(pixels.ravel())
+    image.filepath_raw = filepath
+    image.file_format = 'PNG'
+    image.save()
+    bpy.data.images.remove(image)
+
+
+def png_size(filepath):
+    # width and height from the PNG header, without loading the pixels
+    with open(filepath, "rb") as file:
+        header = file.read(24)
+    return struct.unpack(">II", header[16:24])
+
+
+def compose_contact_sheets(thumbs, columns, rows, filepath, margin=16):
+    # thumbnails row by row, top to bottom, over as many pages as needed,
+    # loading the thumbnails of one page at a time
+    sizes = [png_size(path) for path in thumbs]
+    cell_w = max(width for width, height in sizes)
+    cell_h = max(height for width, height in sizes)
+    page_w = columns * cell_w + (columns + 1) * margin
+    page_h = rows * cell_h + (rows + 1) * margin
+    per_page = columns * rows
+    pages = []
+    for first in range(0, len(thumbs), per_page):
+        page = np.empty((page_h, page_w, 4), dtype=np.float32)
+        page[:] = (0.1, 0.1, 0.1, 1.0)
+        for i, path in enumerate(thumbs[first:first + per_page]):
+            image = load_pixels(path)
+            row, column = divmod(i, columns)
+            h, w = image.shape[:2]
+            x = margin + column * (cell_w + margin)
+            top = page_h - margin - row * (cell_h + margin)  # pixels go bottom up
+            page[top - h:top, x:x + w] = image
+        path = "%s_%03d.png" % (filepath, len(pages) + 1)
+        save_pixels(page, path)
+        pages.append(path)
+    return pages
+
+
+class SEQUENCER_OT_storyboard_contact_sheet(WorkerOperator, bpy.types.Operator):
+    """Render one frame per camera scene strip and lay them out on contact sheet pages"""
+    bl_idname = "sequencer.storyboard_contact_sheet"
+    bl_label = "Storyboard Contact Sheet"
+    bl_options = {'REGISTER'}
+
+    status = "Rendering storyboard"
+
+    frame_choice: EnumProperty(
+        name="Frame",
+        items=(
+            ('FIRST', "First", "First frame of each shot"),
+            ('MIDDLE', "Middle", "Middle frame of each shot"),
+            ('MARKER', "Marker", "First marker inside each shot, or the middle frame"),
+        ),
+        default='MIDDLE')
+    columns: bpy.props.IntProperty(name="Columns", default=4, min=1)
+    rows: bpy.props.IntProperty(name="Rows", default=4, min=1)
+    thumbnail_width: bpy.props.IntProperty(name="Thumbnail Width", default=480, min=32)
+    filepath: bpy.props.StringProperty(
+        name="Output",
+        description="Contact sheet pages are saved as <output>_001.png and so on",
+        default="//storyboard/contact_sheet",
+        subtype='FILE_PATH')
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Background Blender processes rendering at the same time, 0 uses the add-on preferences",
+        default=0,
+        min=0)
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        scene = context.scene
+        strips = sorted(camera_strips(scene), key=lambda strip: (strip.frame_final_start, -strip.channel))
+        if not strips:
+            self.report({'WARNING'}, "No camera scene strips")
+            return {'CANCELLED'}
+
+        cache = get_shot_cache()
+        fps = scene.render.fps / scene.render.fps_base
+        settings = render_settings(scene)
+        settings_key = render_settings_key(scene)
+        state_hashes = {}
+        self.thumbs = []
+        self.hits = 0
+        jobs = []
+        for i, strip in enumerate(strips):
+            source = source_scene_of(strip.scene)
+            if source.name not in state_hashes:
+                state_hashes[source.name] = scene_state_hash(source)
+            render = scene.render
+            width = self.thumbnail_width
+            height = max(1, round(width * render.resolution_y * render.pixel_aspect_y
+                                  / (render.resolution_x * render.pixel_aspect_x)))
+            frame = int(storyboard_frame(scene, strip, self.frame_choice) + source_frame_offset(strip))
+            duration = strip.frame_final_duration
+            label = "%s  %d fr  %.1f s" % (strip.name, duration, duration / fps)
+            digest = shot_hash(strip, state_hashes[source.name],
+                               ("thumbnail", frame, width, height, label) + settings_key)
+            thumb_dir = cache.lookup(digest)
+            if thumb_dir:
+                self.hits += 1
+            else:
+                thumb_dir = cache.prepare(digest)
+                jobs.append((digest, {
+                    "scene": strip.scene.name,
+                    "camera": strip.scene_camera.name,
+                    "frame": frame,
+                    "resolution": [width, height],
+                    "percentage": 100,
+                    "file_format": 'PNG',
+                    "settings": settings,
+                    "stamp_note": label,
+                    "filepath": os.path.join(thumb_dir, "thumbnail"),
+                }, os.path.join(thumb_dir, "render.log")))
+            self.thumbs.append((digest, thumb_dir))
+
+        self.cache = cache
+        if not jobs:
+            self.failed = []
+            return self.all_finished(context)
+        pool = WorkerPool(save_worker_copy(), self.workers or get_preference("render_workers"))
+        for digest, job, log_path in jobs:
+            pool.add(digest, job, log_path)
+        return self.start_workers(context, pool)
+
+    def job_finished(self, context, digest):
+        self.cache.commit(digest)
+
+    def all_finished(self, context):
+        thumbs = []
+        for digest, thumb_dir in self.thumbs:
+            files = frame_files(thumb_dir) if digest not in self.failed else []
+            if files:
+                thumbs.append(os.path.join(thumb_dir, files[0]))
+        if not thumbs:
+            return {'CANCELLED'}
+        filepath = bpy.path.abspath(self.filepath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        pages = compose_contact_sheets(thumbs, self.columns, self.rows, filepath)
+        self.cache.evict(keep={digest for digest, thumb_dir in self.thumbs})
+        self.report({'INFO'}, "%d shots on %d pages (%d cached, %d rendered): %s" % (
+            len(thumbs), len(pages), self.hits, len(self.thumbs) - self.hits, os.path.dirname(filepath)))
+        return {'FINISHED'}
+
+
+class SceneStripToolsPreferences(bpy.types.AddonPreferences):
+    bl_idname = __name__
+
+    render_workers: bpy.props.IntProperty(
+        name="Render Workers",
+        description="Background Blender processes rendering shots at the same time",
+        default=os.cpu_count() or 1,
+        min=1)
+
+    cache_directory: bpy.props.StringProperty(
+        name="Shot Cache",
+        description="Folder for rendered shots reused while their inputs don't change, "
+                    "empty uses the temporary folder",
+        default="",
+        subtype='DIR_PATH')
+
+    cache_size_limit: bpy.props.IntProperty(
+        name="Shot Cache Size (GB)",
+        description="Least recently used shots are removed when the cache grows beyond this",
+        default=20,
+        min=1)
+
+    switch_mode: EnumProperty(
+        name="Camera Switching",
+        items=(
+            ('IMMEDIATE', "Immediate", "Switch the camera on every frame change"),
+            ('DEBOUNCED', "Debounced", "While scrubbing, switch the camera once the playhead rests"),
+        ),
+        default='DEBOUNCED')
+
+    debounce_interval: bpy.props.FloatProperty(
+        name="Debounce Interval",
+        description="Seconds the playhead has to rest before the camera switches",
+        default=0.05,
+        min=0.0,
+        max=1.0,
+        subtype='TIME_ABSOLUTE')
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.prop(self, "render_workers")
+        layout.prop(self, "cache_directory")
+        layout.prop(self, "cache_size_limit")
+        layout.prop(self, "switch_mode")
+        if self.switch_mode == 'DEBOUNCED':
+            layout.prop(self, "debounce_interval")
+
+
+def get_preference(name):
+    # falls back to the defaults when running from the text editor
+    addon = bpy.context.preferences.addons.get(__name__)
+    if addon:
+        return getattr(addon.preferences, name)
+    return SceneStripToolsPreferences.__annotations__[name].keywords["default"]
+
+
+# Shot list exchange
+
+def shot_events(scene):
+    # the visible shots of the edit, in edit order, one at a time
+    index = get_shot_index(scene)
+    sequences = scene.sequence_editor.sequences_all
+    for start, end, strip_name, camera_name in zip(index.starts, index.ends, index.strips, index.cameras):
+        strip = sequences.get(strip_name)
+        if strip is None:
+            continue
+        offset = int(source_frame_offset(strip))
+        yield {
+            "shot": strip_name,
+            "camera": camera_name,
+            "scene": source_scene_of(strip.scene).name,
+            "channel": strip.channel,
+            "record_in": start,
+            "record_out": end,
+            "source_in": start + offset,
+            "source_out": end + offset,
+        }
+
+
+def timecode(frames, fps):
+    seconds, frame = divmod(int(frames), fps)
+    minutes, second = divmod(seconds, 60)
+    hours, minute = divmod(minutes, 60)
+    return "%02d:%02d:%02d:%02d" % (hours, minute, second, frame)
+
+
+def timecode_frames(text, fps):
+    hours, minutes, seconds, frames = (int(part) for part in re.split(r"[:;.]", text))
+    return ((hours * 60 + minutes) * 60 + seconds) * fps + frames
+
+
+def edit_fps(scene):
+    return max(1, round(scene.render.fps / scene.render.fps_base))
+
+
+EDL_RECORD_START = 3600  # edits start at 01:00:00:00, in seconds
+EDL_MAX_EVENT = 999  # CMX3600 event numbers have three digits and wrap around
+
+
+def edl_reel(camera_name, reels, used):
+    # an eight character reel name per camera, numbered where the names of
+    # two cameras would be cut to the same reel
+    reel = reels.get(camera_name)
+    if reel is None:
+        base = reel = re.sub(r"[^A-Za-z0-9_]", "_", camera_name)[:8] or "AX"
+        number = 1
+        while reel in used:
+            suffix = str(number)
+            reel = base[:8 - len(suffix)] + suffix
+            number += 1
+        reels[camera_name] = reel
+        used.add(reel)
+    return reel
+
+
+def write_edl(scene, output):
+    fps = edit_fps(scene)
+    record_offset = EDL_RECORD_START * fps - scene.frame_start
+    reels = {}
+    used = set()
+    output.write("TITLE: %s\n" % scene.name)
+    output.write("FCM: NON-DROP FRAME\n\n")
+    for number, event in enumerate(shot_events(scene)):
+        reel = edl_reel(event["camera"], reels, used)
+        output.write("%03d  %-8s V     C        %s %s %s %s\n" % (
+            number % EDL_MAX_EVENT + 1, reel,
+            timecode(event["source_in"], fps), timecode(event["source_out"], fps),
+            timecode(event["record_in"] + record_offset, fps), timecode(event["record_out"] + record_offset, fps)))
+        output.write("* FROM CLIP NAME: %s\n" % event["shot"])
+        output.write("* CAMERA: %s\n" % event["camera"])
+        output.write("* SCENE: %s\n\n" % event["scene"])
+
+
+def write_shot_json(scene, output):
+    output.write('{"scene": %s, "fps": %d, "shots": [' % (json.dumps(scene.name), edit_fps(scene)))
+    separator = "\n"
+    for event in shot_events(scene):
+        output.write(separator + json.dumps(event))
+        separator = ",\n"
+    output.write("\n]}\n")
+
+
+EDL_EVENT = re.compile(
+    r"^(\d+)\s+(\S+)\s+V\S*\s+C\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*$")
+
+
+def read_edl(filepath, scene):
+    # (camera, record in, record out, channel, shot) from an EDL written by write_edl
+    # or any other cuts-only CMX3600 list, taking the reel as camera name
+    fps = edit_fps(scene)
+    record_offset = EDL_RECORD_START * fps - scene.frame_start
+    event = None
+    with open(filepath) as edl:
+        for line in edl:
+            match = EDL_EVENT.match(line)
+            if match:
+                if event:
+                    yield event
+                event = [match.group(2),
+                         timecode_frames(match.group(5), fps) - record_offset,
+                         timecode_frames(match.group(6), fps) - record_offset,
+                         1, None]
+            elif event and line.startswith("* CAMERA:"):
+                event[0] = line.split(":", 1)[1].strip()
+            elif event and line.startswith("* FROM CLIP NAME:"):
+                event[4] = line.split(":", 1)[1].strip()
+    if event:
+        yield event
+
+
+def read_shot_json(filepath):
+    with open(filepath) as shot_list:
+        data = json.load(shot_list)
+    for event in data["shots"] if isinstance(data, dict) else data:
+        yield [event["camera"], event["record_in"], event["record_out"], event.get("channel", 1), event.get("shot")]
+
+
+def plan_imported_shots(scene, events):
+    # collision-free strips for the imported events, the same way as marker conversion
+    ed = scene.sequence_editor
+    allocator = ChannelAllocator.from_sequences(ed.sequences) if ed else ChannelAllocator()
+    plan = []
+    missing = set()
+    for camera_name, start, end, channel, shot in events:
+        if camera_name not in bpy.data.objects:
+            missing.add(camera_name)
+            continue
+        if end <= start:
+            continue
+        new_channel = allocator.allocate(start, end, max(1, channel))
+        if new_channel is not None:
+            plan.append((camera_name, start, end, new_channel, shot or camera_name))
+    return plan, missing
+
+
+class SEQUENCER_OT_export_shot_list(bpy.types.Operator, ExportHelper):
+    """Export the camera shots of the edit as a CMX3600 EDL or a JSON shot list"""
+    bl_idname = "sequencer.export_shot_list"
+    bl_label = "Export Shot List"
+
+    filename_ext = ".edl"
+    filter_glob: bpy.props.StringProperty(default="*.edl;*.json", options={'HIDDEN'})
+    file_format: EnumProperty(
+        name="Format",
+        items=(
+            ('EDL', "CMX3600 EDL", "Cuts-only edit decision list"),
+            ('JSON', "JSON", "Shot list with camera, scene, channel, source and record frames"),
+        ),
+        default='EDL')
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def check(self, context):
+        self.filename_ext = ".json" if self.file_format == 'JSON' else ".edl"
+        return ExportHelper.check(self, context)
+
+    def execute(self, context):
+        with open(self.filepath, "w") as output:
+            if self.file_format == 'JSON':
+                write_shot_json(context.scene, output)
+            else:
+                write_edl(context.scene, output)
+        return {'FINISHED'}
+
+
+class SEQUENCER_OT_import_shot_list(bpy.types.Operator, ImportHelper):
+    """Add camera scene strips from a CMX3600 EDL or a JSON shot list"""
+    bl_idname = "sequencer.import_shot_list"
+    bl_label = "Import Shot List"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filter_glob: bpy.props.StringProperty(default="*.edl;*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        scene = context.scene
+        if self.filepath.lower().endswith(".json"):
+            events = read_shot_json(self.filepath)
+        else:
+            events = read_edl(self.filepath, scene)
+        plan, missing = plan_imported_shots(scene, events)
+        if missing:
+            self.report({'WARNING'}, "Cameras not found: " + ", ".join(sorted(missing)))
+        if not plan:
+            return {'CANCELLED'}
+        apply_camera_strip_plan(scene, plan, get_intermediate_scene(scene))
+        self.report({'INFO'}, "Imported %d shots" % len(plan))
+        return {'FINISHED'}
+
+
+def menu_export_shot_list(self, context):
+    self.layout.operator("sequencer.export_shot_list", text="Scene Strip Shot List (.edl/.json)")
+
+
+def menu_import_shot_list(self, context):
+    self.layout.operator("sequencer.import_shot_list", text="Scene Strip Shot List (.edl/.json)")
+
+
+# Timeline report
+
+REPORT_FIELDS = ("kind", "start", "end", "strip", "camera", "detail")
+
+
+def overlap_ranges(intervals):
+    # (start, end, depth) ranges where two or more (start, end, ...) intervals overlap
+    events = sorted([(iv[0], 1) for iv in intervals] + [(iv[1], -1) for iv in intervals])
+    ranges = []
+    depth = 0
+    prev_frame = None
+    for frame, step in events:
+        if depth >= 2 and frame > prev_frame:
+            if ranges and ranges[-1][1] == prev_frame:
+                ranges[-1][1] = frame
+                ranges[-1][2] = max(ranges[-1][2], depth)
+            else:
+                ranges.append([prev_frame, frame, depth])
+        depth += step
+        prev_frame = frame
+    return ranges
+
+
+def timeline_report(scene):
+    # Sweep the camera scene strips of the edit once. Returns report rows
+    # (see REPORT_FIELDS) for coverage gaps, overlapping strips, shots never
+    # on screen and strips without a scene or camera, and a dict of
+    # shot statistics.
+    rows = []
+    intervals = []
+    for seq, start, end, channels in timeline_strips(scene.sequence_editor.sequences):
+        if seq.type != 'SCENE' or seq.mute:
+            continue
+        if seq.scene is None:
+            rows.append(("NO_SCENE", start, end, seq.name, "", "no scene"))
+        elif source_scene_of(seq.scene) != scene:
+            continue
+        elif seq.scene_camera is None:
+            rows.append(("NO_CAMERA", start, end, seq.name, "", "no camera"))
+        else:
+            intervals.append((start, end, (tuple(-channel for channel in channels), seq.frame_final_start), seq))
+
+    segments = flatten_intervals(intervals)
+    visible = [0] * len(intervals)
+    for lo, hi, i in segments:
+        visible[i] += hi - lo
+    for i, (start, end, rank, seq) in enumerate(intervals):
+        if not visible[i]:
+            rows.append(("HIDDEN_SHOT", start, end, seq.name, seq.scene_camera.name, "covered by other strips"))
+
+    covered = scene.frame_start
+    for lo, hi, i in segments:
+        if lo > covered and covered <= scene.frame_end:
+            rows.append(("GAP", covered, min(lo, scene.frame_end + 1), "", "", "no camera strip"))
+        covered = max(covered, hi)
+    if covered <= scene.frame_end:
+        rows.append(("GAP", covered, scene.frame_end + 1, "", "", "no camera strip"))
+
+    for start, end, depth in overlap_ranges(intervals):
+        rows.append(("OVERLAP", start, end, "", "", "%d camera strips" % depth))
+    rows.sort(key=lambda row: (row[1], row[0]))
+
+    lengths = []
+    cameras = set()
+    for lo, hi, i in segments:
+        seq = intervals[i][3]
+        cameras.add(seq.scene_camera.name)
+        if lengths and lengths[-1][0] == i and lengths[-1][2] == lo:
+            lengths[-1][2] = hi
+        else:
+            lengths.append([i, lo, hi])
+    lengths = [hi - lo for i, lo, hi in lengths]
+    stats = {
+        "strips": len(intervals),
+        "shots": len(lengths),
+        "cameras": len(cameras),
+        "covered_frames": sum(lengths),
+        "shortest_shot": min(lengths, default=0),
+        "longest_shot": max(lengths, default=0),
+        "mean_shot": sum(lengths) / len(lengths) if lengths else 0.0,
+    }
+    return rows, stats
+
+
+def write_report_csv(rows, output):
+    writer = csv.writer(output)
+    writer.writerow(REPORT_FIELDS)
+    writer.writerows(rows)
+
+
+class SEQUENCER_OT_timeline_report(bpy.types.Operator):
+    """Report gaps, overlapping camera strips, shots never on screen and strips without a camera"""
+    bl_idname = "sequencer.timeline_report"
+    bl_label = "Timeline Report"
+    bl_options = {'REGISTER'}
+
+    shown = 20  # rows listed in the popup, the CSV export has them all
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context):
+        rows, stats = timeline_report(context.scene)
+        counts = {}
+        for row in rows:
+            counts[row[0]] = counts.get(row[0], 0) + 1
+        scene_name = context.scene.name
+
+        def draw(menu, context):
+            layout = menu.layout
+            layout.label(text="%d shots from %d strips, %d cameras" % (stats["shots"], stats["strips"], stats["cameras"]))
+            layout.label(text="Shot length %d-%d, mean %.1f frames" % (
+                stats["shortest_shot"], stats["longest_shot"], stats["mean_shot"]))
+            layout.label(text=", ".join("%s: %d" % item for item in sorted(counts.items())) or "No issues found")
+            if rows:
+                layout.separator()
+            for kind, start, end, strip_name, camera_name, detail in rows[:self.shown]:
+                op = layout.operator(
+                    "sequencer.goto_edit_frame",
+                    text="%s %d-%d %s %s" % (kind, start, end, strip_name, detail),
+                    icon="ERROR")
+                op.scene_name = scene_name
+                op.strip_name = strip_name
+                op.frame = start
+            if len(rows) > self.shown:
+                layout.label(text="... and %d more" % (len(rows) - self.shown))
+            layout.separator()
+            layout.operator("sequencer.export_timeline_report", icon="EXPORT")
+
+        context.window_manager.popup_menu(draw, title="Timeline Report", icon="SEQ_STRIP_DUPLICATE")
+        return {'FINISHED'}
+
+
+class SEQUENCER_OT_export_timeline_report(bpy.types.Operator, ExportHelper):
+    """Export the timeline report of the edit as CSV"""
+    bl_idname = "sequencer.export_timeline_report"
+    bl_label = "Export Timeline Report"
+
+    filename_ext = ".csv"
+    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context):
+        rows, stats = timeline_report(context.scene)
+        with open(self.filepath, "w", newline="") as output:
+            write_report_csv(rows, output)
+        self.report({'INFO'}, "Wrote %d report rows" % len(rows))
+        return {'FINISHED'}
+
+
+class SEQUENCER_OT_set_shot_collections(bpy.types.Operator):
+    """Set the collections the selected camera strips need, for collection culling"""
+    bl_idname = "sequencer.set_shot_collections"
+    bl_label = "Set Shot Collections"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: EnumProperty(
+        name="Collections",
+        items=(
+            ('FRUSTUM', "Seen by Camera", "Collections with objects inside the camera view of each strip"),
+            ('SELECTED', "Of Selected Objects", "Collections of the objects selected in the 3D View"),
+            ('CLEAR', "Clear", "Show every collection during the shots"),
+        ),
+        default='FRUSTUM')
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.sequence_editor is not None
+
+    def execute(self, context):
+        scene = context.scene
+        strips = [seq for seq in scene.sequence_editor.sequences_all if seq.select and is_camera_strip(seq, scene)]
+        if not strips:
+            self.report({'WARNING'}, "No camera strips selected")
+            return {'CANCELLED'}
+
+        if self.source == 'SELECTED':
+            selected = [collection.name for collection in scene.collection.children_recursive
+                        if any(obj.select_get() for obj in collection.objects)]
+        frame = scene.frame_current
+        if self.source == 'FRUSTUM':
+            # sample every object evaluated, without the switcher changing the
+            # camera or culling collections at the sampled frames
+            restore_collections(scene)
+            values.sampling = True
+        try:
+            for strip in strips:
+                if self.source == 'CLEAR':
+                    if SHOT_COLLECTIONS_PROP in strip:
+                        del strip[SHOT_COLLECTIONS_PROP]
+                elif self.source == 'SELECTED':
+                    strip[SHOT_COLLECTIONS_PROP] = selected
+                else:
+                    strip[SHOT_COLLECTIONS_PROP] = frustum_collections(scene, strip)
+        finally:
+            values.sampling = False
+        if self.source == 'FRUSTUM':
+            scene.frame_set(frame)
+
+        restore_collections(scene)
+        invalidate_shot_index(scene)
+        self.report({'INFO'}, "Set the shot collections of %d strips" % len(strips))
+        return {'FINISHED'}
+
+
+# Audio cut suggestions
+
+CUE_MARKER_PREFIX = "CUE_"
+
+
+def sound_onset_strength(filepath, start, duration, hop=512, window=2048, chunk_seconds=10.0):
+    # Spectral flux of a sound file from start for duration seconds, decoded
+    # chunk_seconds at a time. Returns the flux per hop and the sample rate.
+    sound = aud.Sound(filepath).rechannel(1)
+    rate = sound.specs[0]
+    hann = np.hanning(window).astype(np.float32)
+    flux = [np.empty(0, dtype=np.float32)]
+    tail = np.empty(0, dtype=np.float32)
+    previous = None
+    position = start
+    end = start + duration
+    while position < end:
+        chunk_end = min(end, position + chunk_seconds)
+        data = sound.limit(position, chunk_end).data()
+        if not len(data):
+            break
+        samples = np.concatenate((tail, data.reshape(len(data), -1)[:, 0].astype(np.float32)))
+        count = (len(samples) - window) // hop + 1
+        if count > 0:
+            frames = np.lib.stride_tricks.sliding_window_view(samples, window)[::hop][:count]
+            spectrum = np.log1p(np.abs(np.fft.rfft(frames * hann, axis=1)))
+            if previous is None:
+                previous = spectrum[0]
+            rise = np.diff(np.vstack((previous[None], spectrum)), axis=0)
+            flux.append(np.maximum(rise, 0.0).sum(axis=1))
+            previous = spectrum[-1]
+            tail = samples[count * hop:]
+        else:
+            tail = samples
+        position = chunk_end
+    return np.concatenate(flux), rate
+
+
+def pick_onsets(flux, spacing, sensitivity=0.5):
+    # indices of the flux peaks which are the highest within spacing hops and
+    # stand out from their neighbourhood by sensitivity standard deviations
+    if len(flux) < 3:
+        return np.empty(0, dtype=np.int64)
+    spacing = max(1, int(spacing))
+    neighbourhood = np.lib.stride_tricks.sliding_window_view(np.pad(flux, spacing, mode='edge'), 2 * spacing + 1)
+    peak = flux >= neighbourhood.max(axis=1)
+    loud = flux > neighbourhood.mean(axis=1) + sensitivity * flux.std()
+    return np.flatnonzero(peak & loud & (flux > 0))
+
+
+def sound_strip_onsets(scene, strip, min_shot_length, sensitivity=0.5, hop=512, window=2048):
+    # sorted edit frames of the onsets in the visible part of a sound strip
+    fps = scene.render.fps / scene.render.fps_base
+    offset = source_frame_offset(strip)
+    start = (strip.frame_final_start + offset) / fps
+    flux, rate = sound_onset_strength(
+        bpy.path.abspath(strip.sound.filepath), start, strip.frame_final_duration / fps, hop, window)
+    peaks = pick_onsets(flux, min_shot_length * rate / (fps * hop), sensitivity)
+    seconds = start + (peaks * hop + window / 2) / rate
+    frames = np.unique(np.round(seconds * fps - offset).astype(np.int64))
+    return frames[(frames > strip.frame_final_start) & (frames < strip.frame_final_end)]
+
+
+def snap_frames(frames, onsets, distance):
+    # the nearest onset within distance of each frame, or the frame itself
+    frames = np.asarray(frames, dtype=np.int64)
+    if not len(onsets) or not len(frames):
+        return frames
+    right = np.clip(np.searchsorted(onsets, frames), 0, len(onsets) - 1)
+    left = np.clip(right - 1, 0, len(onsets) - 1)
+    nearest = np.where(np.abs(onsets[left] - frames) <= np.abs(onsets[right] - frames), onsets[left], onsets[right])
+    return np.where(np.abs(nearest - frames) <= distance, nearest, frames)
+
+
+def plan_snapped_cuts(scene, onsets, distance):
+    # the camera strips with every cut moved onto the nearest onset, as a
+    # diff_camera_strips style plan; each strip keeps its own shot, so its
+    # name, collections and proxy stay with it
+    existing = top_camera_strips(scene)
+    cuts = sorted({start for _, start, _, _ in existing} & {end for _, _, end, _ in existing})
+    snapped = dict(zip(cuts, snap_frames(cuts, onsets, distance).tolist()))
+    kept, changed, removed = [], [], []
+    for camera_name, start, end, seq in existing:
+        new_start, new_end = snapped.get(start, start), snapped.get(end, end)
+        if new_end <= new_start:
+            removed.append(seq)
+        elif (new_start, new_end) == (start, end):
+            kept.append(seq)
+        else:
+            changed.append((seq, (camera_name, new_start, new_end)))
+    return kept, changed, removed, []
+
+
+class SEQUENCER_OT_suggest_audio_cuts(bpy.types.Operator):
+    """Find the onsets in the active sound strip and mark them, or snap the camera cuts to them"""
+    bl_idname = "sequencer.suggest_audio_cuts"
+    bl_label = "Audio Cut Suggestions"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    action: EnumProperty(
+        name="Action",
+        items=(
+            ('MARKERS', "Add Cue Markers", "Add a marker at each onset, to bind cameras to"),
+            ('SNAP', "Snap Cuts", "Move the cuts between camera strips onto the nearest onset"),
+        ),
+        default='MARKERS')
+    sensitivity: bpy.props.FloatProperty(
+        name="Threshold",
+        description="How far above its neighbourhood an onset must stand out, lower finds more",
+        default=0.5,
+        min=0.0,
+        soft_max=3.0)
+    min_shot_length: bpy.props.IntProperty(
+        name="Shortest Shot",
+        description="Frames between suggested cuts at least",
+        default=12,
+        min=1)
+    snap_distance: bpy.props.IntProperty(
+        name="Snap Distance",
+        description="Cuts move onto onsets up to this many frames away",
+        default=6,
+        min=1)
+
+    @classmethod
+    def poll(cls, context):
+        strip = act_strip(context)
+        return bool(strip) and strip.type == 'SOUND' and strip.sound is not None
+
+    def execute(self, context):
+        scene = context.scene
+        strip = act_strip(context)
+        onsets = sound_strip_onsets(scene, strip, self.min_shot_length, self.sensitivity)
+        if not len(onsets):
+            self.report({'INFO'}, "No onsets found in " + strip.name)
+            return {'CANCELLED'}
+
+        if self.action == 'SNAP':
+            sync = plan_snapped_cuts(scene, onsets, self.snap_distance)
+            moved, removed, added = apply_marker_sync(scene, sync, get_intermediate_scene(scene))
+            self.report({'INFO'}, "Snapped %d camera strips to %d onsets" % (moved, len(onsets)))
+            return {'FINISHED'}
+
+        markers = scene.timeline_markers
+        for marker in [marker for marker in markers if marker.name.startswith(CUE_MARKER_PREFIX) and not marker.camera]:
+            markers.remove(marker)
+        for i, frame in enumerate(onsets.tolist()):
+            markers.new("%s%03d" % (CUE_MARKER_PREFIX, i + 1), frame=frame)
+        self.report({'INFO'}, "Added %d cue markers" % len(onsets))
+        return {'FINISHED'}
+
+
+class VIEW_3D_OT_follow_sequencer(bpy.types.Operator):
+    """Toggle whether this viewport follows the camera of the sequencer strips"""
+    bl_idname = "view3d.follow_sequencer"
+    bl_label = "Follow Sequencer"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.area is not None and context.area.type == 'VIEW_3D'
+
+    def execute(self, context):
+        area_pointer = context.area.as_pointer()
+        if area_pointer in unfollowed_viewports:
+            unfollowed_viewports.discard(area_pointer)
+            follow_camera(context.scene, context.window)
+        else:
+            unfollowed_viewports.add(area_pointer)
+        context.area.tag_redraw()
+        return {'FINISHED'}
+
+
+def menu_follow_sequencer(self, context):
+    if not context.scene.asset_manager.link_seq_to_3d_view:
+        return
+    following = context.area.as_pointer() not in unfollowed_viewports
+    self.layout.separator()
+    self.layout.operator("view3d.follow_sequencer", icon="CHECKBOX_HLT" if following else "CHECKBOX_DEHLT")
 
 
 def menu_toggle_scene(self, context):
     self.layout.separator()
     self.layout.operator("sequencer.scene_change")
     self.layout.operator("sequencer.match_frame")
+    self.layout.operator("sequencer.find_edit_uses")
+    self.layout.operator("sequencer.shift_strips_after")
+    self.layout.operator("sequencer.suggest_audio_cuts")
 
 
 def menu_add_camera(self, context):
     self.layout.operator("view3d.add_scene_strip", icon="VIEW_CAMERA")
+    self.layout.operator("view3d.add_selected_cameras", icon="OUTLINER_OB_CAMERA")
+    self.layout.operator("sequencer.split_camera_cuts", icon="SEQ_SPLITVIEW")
 
 
 def menu_link_tdview(self, context):
@@ -444,15 +3833,36 @@ def menu_link_tdview(self, context):
 def menu_convert_markers(self, context):
     self.layout.separator()
     self.layout.operator("sequencer.convert_cameras")
+    self.layout.operator_menu_enum("sequencer.sync_camera_markers", "direction")
 
 
 classes = (
     VIEW_3D_PT_add_scene_strip,
+    VIEW_3D_OT_add_selected_cameras,
     PropertyGroup,
+    SEQUENCER_OT_split_camera_cuts,
+    SEQUENCER_OT_shift_strips_after,
     SEQUENCE_PT_convert_cameras,
+    SEQUENCER_OT_sync_camera_markers,
+    SEQUENCER_OT_timeline_report,
+    SEQUENCER_OT_export_timeline_report,
+    SEQUENCER_OT_set_shot_collections,
+    SEQUENCER_OT_suggest_audio_cuts,
+    VIEW_3D_OT_follow_sequencer,
+    SEQUENCER_OT_cleanup_intermediate_scenes,
     SEQUENCER_PT_scene_tools,
     SEQUENCER_OT_scene_change,
     SEQUENCER_OT_match_frame,
+    SEQUENCER_OT_find_edit_uses,
+    SEQUENCER_OT_goto_edit_frame,
+    SEQUENCER_OT_reset_handler_stats,
+    SEQUENCER_OT_dump_handler_stats,
+    SEQUENCER_OT_render_preview_proxies,
+    SEQUENCER_OT_render_shots,
+    SEQUENCER_OT_storyboard_contact_sheet,
+    SEQUENCER_OT_export_shot_list,
+    SEQUENCER_OT_import_shot_list,
+    SceneStripToolsPreferences,
     )
 
 register, unregister = bpy.utils.register_classes_factory(classes)
@@ -466,17 +3876,36 @@ def register():
     bpy.types.SEQUENCER_MT_context_menu.append(menu_toggle_scene)
     bpy.types.SEQUENCER_HT_header.append(menu_link_tdview)
     bpy.types.SEQUENCER_MT_add.prepend(menu_add_camera)
+    bpy.types.VIEW3D_MT_view.append(menu_follow_sequencer)
     bpy.types.SEQUENCER_MT_marker.append(menu_convert_markers)
+    bpy.types.TOPBAR_MT_file_export.append(menu_export_shot_list)
+    bpy.types.TOPBAR_MT_file_import.append(menu_import_shot_list)
 
     wm = bpy.context.window_manager
-    km = wm.keyconfigs.addon.keymaps.new(name='Scene Change', space_type='SEQUENCE_EDITOR')
-    kmi = km.keymap_items.new(SEQUENCER_OT_scene_change.bl_idname, 'TAB', 'PRESS', ctrl=False, shift=True)
-    addon_keymaps.append((km, kmi))
+    kc = wm.keyconfigs.addon
+    if kc:  # no add-on keyconfig when running in background
+        km = kc.keymaps.new(name='Scene Change', space_type='SEQUENCE_EDITOR')
+        kmi = km.keymap_items.new(SEQUENCER_OT_scene_change.bl_idname, 'TAB', 'PRESS', ctrl=False, shift=True)
+        addon_keymaps.append((km, kmi))
 
     for i in classes:
         register_class(i)
     bpy.types.Scene.asset_manager = bpy.props.PointerProperty(type=PropertyGroup)
 
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.undo_post.append(on_undo_redo)
+    bpy.app.handlers.redo_post.append(on_undo_redo)
+    bpy.app.handlers.load_post.append(on_load_post)
+    bpy.app.handlers.save_pre.append(on_save_pre)
+    bpy.app.handlers.animation_playback_pre.append(on_playback_pre)
+    bpy.app.handlers.animation_playback_post.append(on_playback_post)
+    bpy.app.handlers.render_init.append(on_render_init)
+    bpy.app.handlers.render_complete.append(on_render_done)
+    bpy.app.handlers.render_cancel.append(on_render_done)
+    subscribe_strip_changes()
+    bpy.app.timers.register(sync_frame_handler)  # bpy.data is restricted while registering
+    bpy.app.timers.register(check_viewport_layouts, persistent=True)
+
 
 def unregister():
 
@@ -484,12 +3913,36 @@ def unregister():
     bpy.types.SEQUENCER_MT_context_menu.remove(menu_toggle_scene)
     bpy.types.SEQUENCER_HT_header.remove(menu_link_tdview)
     bpy.types.SEQUENCER_MT_add.remove(menu_add_camera)
+    bpy.types.VIEW3D_MT_view.remove(menu_follow_sequencer)
     bpy.types.SEQUENCER_MT_marker.remove(menu_convert_markers)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_export_shot_list)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_import_shot_list)
 
     for km, kmi in addon_keymaps:
         km.keymap_items.remove(kmi)
     addon_keymaps.clear()
 
+    bpy.msgbus.clear_by_owner(msgbus_owner)
+    detach_as_handler()
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    bpy.app.handlers.undo_post.remove(on_undo_redo)
+    bpy.app.handlers.redo_post.remove(on_undo_redo)
+    bpy.app.handlers.load_post.remove(on_load_post)
+    bpy.app.handlers.save_pre.remove(on_save_pre)
+    on_save_pre()  # show the culled collections again
+    bpy.app.handlers.animation_playback_pre.remove(on_playback_pre)
+    bpy.app.handlers.animation_playback_post.remove(on_playback_post)
+    bpy.app.handlers.render_init.remove(on_render_init)
+    bpy.app.handlers.render_complete.remove(on_render_done)
+    bpy.app.handlers.render_cancel.remove(on_render_done)
+    invalidate_shot_index()
+    viewport_cache.invalidate()
+    if bpy.app.timers.is_registered(flush_camera_switches):
+        bpy.app.timers.unregister(flush_camera_switches)
+    if bpy.app.timers.is_registered(check_viewport_layouts):
+        bpy.app.timers.unregister(check_viewport_layouts)
+    pending_switches.clear()
+
     for i in classes:
         unregister_class(i)
 
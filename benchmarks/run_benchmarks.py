@@ -0,0 +1,299 @@
+# Scene Strip Tools benchmarks
+
+# Times the hot paths of the add-on on synthetic scenes:
+# - the frame-change camera switch, per frame
+# - sequencer.convert_cameras
+# - view3d.add_scene_strip
+# - sequencer.match_frame
+# - sequencer.scene_change
+# - shifting every strip after a frame through the timeline snapshot
+
+# Run headless, from the add-on folder:
+# blender -b --factory-startup --python benchmarks/run_benchmarks.py -- --sizes 1000 10000 50000 --output results.json
+
+# Operators which need a window are run if they can be, and reported as
+# skipped with the reason if they can't. Match frame and scene change also
+# time their work without the window switch, so they always report timings.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOT_LENGTH = 24
+
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location(
+        "scene_strip_tools_bench",
+        os.path.join(ADDON_DIR, "__init__.py"),
+        submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Scene Strip Tools benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="number of scene strips per edit")
+    parser.add_argument("--cameras", type=int, default=200, help="number of cameras")
+    parser.add_argument("--markers", type=int, default=5000, help="camera markers to convert")
+    parser.add_argument("--scenes", type=int, default=100, help="scenes searched by match frame")
+    parser.add_argument("--frames", type=int, default=2000, help="frames timed for the camera switch")
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each operator")
+    parser.add_argument("--output", default="bench_output.json", help="JSON results file")
+    return parser.parse_args(argv)
+
+
+def percentile(ordered, fraction):
+    # nearest rank
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000.0,
+        "p90_ms": percentile(ordered, 0.90) * 1000.0,
+        "p95_ms": percentile(ordered, 0.95) * 1000.0,
+        "p99_ms": percentile(ordered, 0.99) * 1000.0,
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+def timed(func, repeat, setup=None):
+    timings = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def run_operator(op, scene, repeat, setup=None, **override):
+    def call():
+        with bpy.context.temp_override(scene=scene, **override):
+            result = op()
+        if 'FINISHED' not in result and 'CANCELLED' not in result:
+            raise RuntimeError("returned %s" % result)
+    try:
+        call()  # warm up, and find out if it can run at all
+    except (RuntimeError, AttributeError, TypeError) as error:
+        return {"skipped": str(error).strip().splitlines()[-1]}
+    return timed(call, repeat, setup)
+
+
+def make_cameras(scene, count):
+    cameras = []
+    for i in range(count):
+        camera = bpy.data.objects.new("Cam_%04d" % i, bpy.data.cameras.new("Cam_%04d" % i))
+        camera.location = (i, -10.0, 2.0)
+        scene.collection.objects.link(camera)
+        cameras.append(camera)
+    return cameras
+
+
+def make_edit(addon, size, cameras):
+    # size back-to-back camera scene strips, spread over a few channels
+    scene = bpy.data.scenes.new("Edit_%d" % size)
+    scene.sequence_editor_create()
+    for camera in cameras:
+        scene.collection.objects.link(camera)
+    source = addon.get_intermediate_scene(scene)
+    scene.camera = cameras[0]
+
+    plan = []
+    for i in range(size):
+        start = 1 + i * SHOT_LENGTH
+        plan.append((cameras[i % len(cameras)].name, start, start + SHOT_LENGTH, 1 + i % 3))
+    addon.apply_camera_strip_plan(scene, plan, source)
+    scene.frame_start = 1
+    scene.frame_end = size * SHOT_LENGTH
+    scene.asset_manager.link_seq_to_3d_view = True
+    return scene
+
+
+def bench_camera_switch(addon, scene, frames):
+    # cold index build, then one handler call per frame as during playback
+    results = {}
+    addon.invalidate_shot_index(scene)
+    start = time.perf_counter()
+    addon.get_shot_index(scene)
+    results["index_build_ms"] = (time.perf_counter() - start) * 1000.0
+
+    step = max(1, (scene.frame_end - scene.frame_start) // frames)
+    timings = []
+    for frame in range(scene.frame_start, scene.frame_end, step)[:frames]:
+        scene.frame_current = frame
+        start = time.perf_counter()
+        addon.swich_camera_at_frame_change(scene)
+        timings.append(time.perf_counter() - start)
+    results["per_frame"] = summarize(timings)
+    return results
+
+
+def bench_convert_cameras(cameras, markers, repeat):
+    scene = bpy.data.scenes.new("Markers_%d" % markers)
+    for camera in cameras:
+        scene.collection.objects.link(camera)
+    for i in range(markers):
+        marker = scene.timeline_markers.new("F_%05d" % i, frame=1 + i * SHOT_LENGTH)
+        marker.camera = cameras[i % len(cameras)]
+
+    def clear():
+        if scene.sequence_editor:
+            scene.sequence_editor_clear()
+
+    return run_operator(bpy.ops.sequencer.convert_cameras, scene, repeat, setup=clear)
+
+
+def make_movie(directory):
+    # a tiny movie file for the match frame strips
+    scene = bpy.data.scenes.new("Movie")
+    scene.render.engine = 'BLENDER_WORKBENCH'
+    scene.render.resolution_x = 32
+    scene.render.resolution_y = 32
+    scene.frame_end = 48
+    scene.render.image_settings.file_format = 'FFMPEG'
+    scene.render.ffmpeg.format = 'MPEG4'
+    scene.render.filepath = os.path.join(directory, "clip_")
+    with bpy.context.temp_override(scene=scene):
+        bpy.ops.render.render(animation=True, scene=scene.name)
+    path = scene.render.frame_path(frame=scene.frame_start)
+    bpy.data.scenes.remove(scene)
+    return path
+
+
+def bench_match_frame(addon, scenes, repeat, directory):
+    try:
+        movie = make_movie(directory)
+    except RuntimeError as error:
+        return {"skipped": str(error).strip().splitlines()[-1]}
+
+    edits = []
+    for i in range(scenes):
+        scene = bpy.data.scenes.new("Reel_%03d" % i)
+        scene.sequence_editor_create()
+        strip = scene.sequence_editor.sequences.new_movie("clip", movie, 1, 1 + i * 10)
+        scene.sequence_editor.active_strip = strip
+        scene.frame_current = int(strip.frame_final_start) + 5
+        edits.append(scene)
+    first = edits[0]
+
+    results = {}
+    addon.media_index.mark_dirty()
+    start = time.perf_counter()
+    addon.media_index.refresh()
+    results["index_build_ms"] = (time.perf_counter() - start) * 1000.0
+    active = first.sequence_editor.active_strip
+    key = addon.media_key(active)
+    results["lookup"] = timed(lambda: list(addon.media_index.lookup(key)), repeat)
+
+    def match():
+        # index lookup, range checks and the jump, without the window
+        target, frame, strip = addon.match_frame_target(first, active, first.frame_current)
+        target.frame_current = frame
+        target.sequence_editor.active_strip = strip
+
+    results["match"] = timed(match, repeat)
+    results["operator"] = run_operator(bpy.ops.sequencer.match_frame, first, repeat)
+    return results
+
+
+def bench_add_scene_strip(scene, repeat):
+    return run_operator(lambda: bpy.ops.view3d.add_scene_strip('INVOKE_DEFAULT'), scene, repeat)
+
+
+def bench_scene_change(addon, scene, repeat):
+    sequences = scene.sequence_editor.sequences
+    strip = scene.sequence_editor.active_strip = sequences[len(sequences) // 2]
+
+    def change():
+        # source scene and camera assignment, without the window
+        target, camera = addon.scene_strip_target(strip)
+        if camera:
+            target.camera = camera
+
+    return {
+        "change": timed(change, repeat),
+        "operator": run_operator(bpy.ops.sequencer.scene_change, scene, repeat),
+    }
+
+
+def bench_shift_strips(addon, scene, repeat):
+    # shift the second half of the edit later and back again
+    sequences = scene.sequence_editor.sequences
+    frame = (scene.frame_start + scene.frame_end) // 2
+    offsets = [SHOT_LENGTH, -SHOT_LENGTH]
+    shifted = []
+
+    def shift():
+        offset = offsets[len(shifted) % 2]
+        snapshot = addon.TimelineSnapshot(sequences)
+        snapshot.shift_after(frame + (offset < 0) * SHOT_LENGTH, offset)
+        assert not len(snapshot.overlaps())
+        shifted.append(snapshot.write())
+
+    results = timed(shift, repeat)
+    results["strips_moved"] = max(shifted)
+    return results
+
+
+def main():
+    args = parse_args()
+    addon = load_addon()
+    scratch = bpy.data.scenes.new("Cameras")
+    cameras = make_cameras(scratch, args.cameras)
+
+    report = {
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": vars(args),
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            print("Scene Strip Tools benchmark: %d strips" % size)
+            start = time.perf_counter()
+            edit = make_edit(addon, size, cameras)
+            results = report["results"][str(size)] = {
+                "setup_s": time.perf_counter() - start,
+            }
+            results["camera_switch"] = bench_camera_switch(addon, edit, args.frames)
+            results["add_scene_strip"] = bench_add_scene_strip(edit, args.repeat)
+            results["scene_change"] = bench_scene_change(addon, edit, args.repeat)
+            results["shift_strips"] = bench_shift_strips(addon, edit, args.repeat)
+
+        report["results"]["convert_cameras"] = bench_convert_cameras(
+            cameras, args.markers, max(1, args.repeat // 10))
+        report["results"]["match_frame"] = bench_match_frame(addon, args.scenes, args.repeat, directory)
+
+    addon.unregister()
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print("Scene Strip Tools benchmark: results written to", os.path.abspath(args.output))
+
+
+if __name__ == "__main__":
+    main()